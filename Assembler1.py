@@ -1,3 +1,10 @@
+import struct
+import sys
+
+from ir import AD, CONST, DL, IS, REG, SYM, IntermediateCode
+from objfile import ObjectWriter
+from passhooks import start_phase
+
 # --- Setup Tables ---
 # 1. Opcode Table (OPTAB)
 # Format: Mnemonic: (Machine Code, Number of Operands)
@@ -17,182 +24,328 @@ REGTAB = {
     "C": "3",
     "D": "4"
 }
-# 3. Symbol Table (SYMTAB) - To be filled by Pass 1
-# Format: SymbolName: Address
-SYMTAB = {}
-# 4. Intermediate Code (INTERMEDIATE) - To be filled by Pass 1
-INTERMEDIATE = []
-# --- Pass 1 ---
-def pass1():
+
+# Streaming Mode spool record format: one packed ir.py row.
+SPOOL_RECORD = struct.Struct("<qBBBqBq")
+SPOOL_CHUNK = 4096 # Records read per read() call
+DS_CHUNK = 4096 # Reserved words written per write() call
+
+
+def source_lines(source):
+    """Lines of `source`: assembly text as a str, a text stream or an iterable of lines."""
+    if isinstance(source, str):
+        return source.splitlines()
+    return source
+
+
+# --- Assembler ---
+class Assembler:
     """
-    Performs Pass 1 of the assembler:
-    1. Reads the input.asm file.
-    2. Builds the Symbol Table (SYMTAB).
-    3. Generates the Intermediate Code (INTERMEDIATE).
+    One assembly job. The tables below live on the instance rather than
+    in module globals, and nothing touches the file system unless asked
+    to, so separate Assemblers can run in the same process and in
+    different threads at once.
+
+    assemble(source) runs both passes and returns the machine code as
+    text. Errors are collected in `errors` instead of being printed.
+
+    With `hook`, every pass calls it with a passhooks.PhaseReport when
+    it finishes.
     """
-    global LC # Use a global Location Counter
-    LC = 0
-    
-    with open("input.asm", "r") as f:
-        for line in f:
+
+    def __init__(self, hook=None):
+        self.hook = hook
+        self.reset()
+
+    def reset(self):
+        # 3. Symbol Table (SYMTAB) - To be filled by Pass 1
+        # Format: SymbolName: Address
+        self.symtab = {}
+        # 4. Symbol Numbers (SYMNUM) - To be filled by Pass 1
+        # Format: SymbolName: number used for it in the intermediate code
+        self.symnum = {}
+        # 5. Intermediate Code (INTERMEDIATE) - To be filled by Pass 1
+        # Format: ir.py rows (LC, Class, OpCode, Kind1, Value1, Kind2, Value2)
+        self.intermediate = IntermediateCode()
+        # Address field text per symbol number - built once by symbol_fields()
+        self.address_fields = None
+        self.lc = 0 # Location Counter
+        self.forward_refs = 0 # Symbols used before their definition
+        self.errors = []
+
+    def error(self, message):
+        self.errors.append(f"Error: {message}")
+
+    def assemble(self, source):
+        """Runs Pass 1 and Pass 2 over `source` and returns the machine code text."""
+        self.pass1(source)
+        return self.pass2()
+
+    # --- Pass 1 ---
+    def pass1(self, source):
+        """
+        Performs Pass 1 of the assembler:
+        1. Reads the source lines.
+        2. Builds the Symbol Table (symtab).
+        3. Generates the Intermediate Code (intermediate).
+        """
+        timer = start_phase(self.hook, "Assembler1", "pass1")
+        self.reset()
+        lines = source_lines(source)
+        if timer: # Time reads from a stream as I/O
+            lines = timer.file(lines) if hasattr(lines, "read") else timer.count(lines)
+        self.intermediate.extend(self.pass1_entries(lines))
+        if timer:
+            self.finish_pass1(timer)
+
+    def finish_pass1(self, timer):
+        timer.finish(symbols=len(self.symtab), forward_refs=self.forward_refs,
+                     errors=len(self.errors))
+
+    def pass1_entries(self, lines):
+        """
+        Generator behind Pass 1: reads source lines, fills `symtab` and
+        `symnum` and yields one intermediate code row at a time.
+        """
+        symtab = self.symtab
+        symnum = self.symnum
+        self.lc = 0
+
+        for line in lines:
             tokens = line.strip().replace(",", "").split()
             if not tokens:
                 continue
 
             # Handle START directive
             if tokens[0] == "START":
-                LC = int(tokens[1])
-                # Format: (Type, Code, Value)
-                INTERMEDIATE.append(("AD", "01", f"(C,{LC})"))
+                self.lc = int(tokens[1])
+                yield (self.lc, AD, 1, CONST, self.lc)
                 continue
-            
+
             label = None
             opcode_index = 0
 
             # --- Label Detection ---
             # Check if the first token is a label (i.e., not in OPTAB and not END)
             if tokens[0] not in OPTAB and tokens[0] != "END":
-                
+
                 # --- THIS IS THE FIX ---
                 label = tokens[0].replace(":", "") # Strip the colon from the label
                 # --- END OF FIX ---
-                
-                if label in SYMTAB:
+
+                if label in symtab:
                     # If it was a forward reference, update its address
-                    if SYMTAB[label] == -1:
-                        SYMTAB[label] = LC
+                    if symtab[label] == -1:
+                        symtab[label] = self.lc
+                        self.forward_refs += 1
                     else:
-                        print(f"Error: Duplicate label '{label}'")
+                        self.error(f"Duplicate label '{label}'")
                 else:
-                    SYMTAB[label] = LC # Add new label to SYMTAB
-                
+                    symtab[label] = self.lc # Add new label to SYMTAB
+
                 opcode_index = 1 # The opcode is the *next* token
-            
+
             # Stop if line was just a label (e.g., "LOOP:")
             if len(tokens) <= opcode_index:
                 continue
-                
+
             opcode = tokens[opcode_index]
 
             # --- Opcode Processing ---
 
             # Handle END directive
             if opcode == "END":
-                INTERMEDIATE.append(("AD", "05"))
+                yield (self.lc, AD, 5)
                 break # End of Pass 1
 
             # Handle Declarative Statements (DS, DC)
             if opcode == "DS": # Define Storage
                 size = int(tokens[opcode_index + 1])
-                INTERMEDIATE.append(("DL", "01", f"(C,{size})"))
-                LC += size # Increment LC by storage size
+                yield (self.lc, DL, 1, CONST, size)
+                self.lc += size # Increment LC by storage size
                 continue
-            
+
             if opcode == "DC": # Define Constant
-                value = tokens[opcode_index + 1]
-                INTERMEDIATE.append(("DL", "02", f"(C,{value})"))
-                LC += 1 # Increment LC by 1
+                value = int(tokens[opcode_index + 1])
+                yield (self.lc, DL, 2, CONST, value)
+                self.lc += 1 # Increment LC by 1
                 continue
-            
+
             # Handle Imperative Statements (IS)
             if opcode in OPTAB:
                 op_code_val, num_operands = OPTAB[opcode]
-                
-                # Start building the intermediate entry
-                # Format: (Type, OpCode, RegCode, SymbolName)
-                entry = ["IS", op_code_val]
-                
+
+                # Start building the intermediate row
+                # Format: (LC, IS, OpCode, REG, RegCode, SYM, SymbolNumber)
+                entry = [self.lc, IS, int(op_code_val)]
+
                 if num_operands == 2: # e.g., MOVER A, B
                     reg = tokens[opcode_index + 1]
                     sym = tokens[opcode_index + 2]
-                    
-                    if sym not in SYMTAB:
-                        SYMTAB[sym] = -1 # Add symbol as unresolved
-                    
-                    entry.extend([REGTAB[reg], sym]) # Store reg_code and sym_name
-                
+
+                    if sym not in symtab:
+                        symtab[sym] = -1 # Add symbol as unresolved
+
+                    number = symnum.setdefault(sym, len(symnum))
+                    entry.extend([REG, int(REGTAB[reg]), SYM, number])
+
                 elif num_operands == 1: # e.g., JMP LOOP
                     sym = tokens[opcode_index + 1]
-                    
-                    if sym not in SYMTAB:
-                        SYMTAB[sym] = -1 # Add symbol as unresolved
-                        
-                    entry.extend(["0", sym]) # No register, use "0"
-                
+
+                    if sym not in symtab:
+                        symtab[sym] = -1 # Add symbol as unresolved
+
+                    number = symnum.setdefault(sym, len(symnum))
+                    entry.extend([REG, 0, SYM, number]) # No register, use 0
+
                 elif num_operands == 0: # e.g., STOP (if it existed)
                     pass # No operands to add
-                
-                INTERMEDIATE.append(tuple(entry))
-                LC += 1 # Instruction takes 1 memory word
+
+                yield tuple(entry)
+                self.lc += 1 # Instruction takes 1 memory word
                 continue
 
-# --- Pass 2 ---
+    # --- Pass 2 ---
+    def symbol_fields(self):
+        """
+        Address field text for each symbol number, so Pass 2 looks every
+        symbol up once instead of once per use. Built on first use after
+        Pass 1 and kept, so undefined symbols are reported only once
+        however many times Pass 2 runs.
+        """
+        if self.address_fields is not None:
+            return self.address_fields
+        fields = []
+        for symbol_name in self.symnum:
+            if symbol_name in self.symtab:
+                symbol_addr = self.symtab[symbol_name]
+                if symbol_addr == -1:
+                    self.error(f"Symbol '{symbol_name}' was used but not defined.")
+                    symbol_addr = "XXX" # Error code
+            else:
+                self.error(f"Symbol '{symbol_name}' not found in SYMTAB.")
+                symbol_addr = "XXX" # Error code
+            fields.append(str(symbol_addr).zfill(3))
+        self.address_fields = fields
+        return fields
 
-def pass2():
-    """
-    Performs Pass 2 of the assembler:
-    1. Reads the INTERMEDIATE code and SYMTAB.
-    2. Generates the final machinecode.txt.
-    """
-    with open("machinecode.txt", "w") as mc:
-        for entry in INTERMEDIATE:
-            entry_type = entry[0]
-            
+    def machine_lines(self, rows=None):
+        """Yields machine code text for intermediate code rows (default: intermediate)."""
+        fields = self.symbol_fields()
+        for lc, cls, code, kind1, val1, kind2, val2 in (self.intermediate if rows is None else rows):
             # --- Imperative Statement (IS) ---
-            if entry_type == "IS":
-                # Format: (IS, opcode, reg_code, symbol)
-                opcode = entry[1]
-                reg = entry[2]
-                symbol_name = entry[3]
-                
-                if symbol_name in SYMTAB:
-                    symbol_addr = SYMTAB[symbol_name]
-                    if symbol_addr == -1:
-                        print(f"Error: Symbol '{symbol_name}' was used but not defined.")
-                        symbol_addr = "XXX" # Error code
-                else:
-                    print(f"Error: Symbol '{symbol_name}' not found in SYMTAB.")
-                    symbol_addr = "XXX" # Error code
-                
+            if cls == IS:
                 # Write: OPCODE  REG  ADDRESS
-                mc.write(f"{opcode}\t{reg}\t{str(symbol_addr).zfill(3)}\n")
-            
+                address = fields[val2] if kind2 == SYM else "000"
+                yield f"{code:02d}\t{val1}\t{address}\n"
+
             # --- Declarative Statement (DL) ---
-            elif entry_type == "DL":
-                dl_code = entry[1]
-                # Extract value from (C,value)
-                value_str = entry[2].replace("(C,", "").replace(")", "")
-                
-                if dl_code == "01": # DS (Define Storage)
-                    # Reserve N lines of "0" (null instructions)
-                    size = int(value_str)
-                    for _ in range(size):
-                        mc.write("00\t0\t000\n") 
-                
-                elif dl_code == "02": # DC (Define Constant)
+            elif cls == DL:
+                if code == 1: # DS (Define Storage)
+                    # Reserve N lines of "0" (null instructions), a chunk at a time
+                    while val1 > 0:
+                        count = min(val1, DS_CHUNK)
+                        yield "00\t0\t000\n" * count
+                        val1 -= count
+
+                elif code == 2: # DC (Define Constant)
                     # Write the constant value, formatted as data
-                    mc.write(f"00\t0\t{value_str.zfill(3)}\n")
-            
+                    yield f"00\t0\t{str(val1).zfill(3)}\n"
+
             # --- Assembler Directive (AD) ---
-            elif entry_type == "AD":
+            else:
                 # START, END directives don't generate code
-                mc.write("-\n")
+                yield "-\n"
+
+    def pass2(self):
+        """
+        Performs Pass 2 of the assembler:
+        1. Reads the intermediate code and symtab.
+        2. Returns the final machine code text.
+        """
+        timer = start_phase(self.hook, "Assembler1", "pass2")
+        text = "".join(self.machine_lines())
+        if timer:
+            timer.lines = len(self.intermediate)
+            timer.finish(symbols=len(self.symtab), chars=len(text), errors=len(self.errors))
+        return text
+
+    def write_object(self, f, rows=None):
+        """
+        Pass 2 writing a binary object file (see objfile.py) to the binary
+        file `f` instead of machine code text. `rows` defaults to the
+        intermediate code; pass read_spool() for a streamed run. A DS is
+        stored as one reserved block; undefined symbols become -1.
+        """
+        addrs = [self.symtab.get(symbol_name, -1) for symbol_name in self.symnum]
+        start = 0
+        out = ObjectWriter(f)
+        for lc, cls, code, kind1, val1, kind2, val2 in (self.intermediate if rows is None else rows):
+            if cls == IS:
+                out.word(lc, code, val1, addrs[val2] if kind2 == SYM else 0)
+            elif cls == DL:
+                if code == 1: # DS
+                    out.reserve(lc, val1)
+                else: # DC
+                    out.word(lc, 0, 0, val1)
+            elif code == 1: # START
+                start = val1
+        out.finish(self.symtab.items(), start)
+
+    # --- Streaming Mode ---
+    # Pass 1 spools each intermediate row to disk as it reads the source,
+    # and Pass 2 streams the spool into the output, so memory grows with
+    # the number of symbols rather than the size of the program.
+    def pass1_streaming(self, source, spool):
+        """Streaming Pass 1: reads the `source` text stream and writes the intermediate code to the binary file `spool`."""
+        timer = start_phase(self.hook, "Assembler1", "pass1_streaming")
+        if timer:
+            source, spool = timer.file(source), timer.file(spool)
+        self.reset()
+        pack = SPOOL_RECORD.pack
+        write = spool.write
+        for row in self.pass1_entries(source):
+            write(pack(*(row + (0,) * (7 - len(row)))))
+        if timer:
+            self.finish_pass1(timer)
+
+    def pass2_streaming(self, spool, output):
+        """Streaming Pass 2: turns a spool from pass1_streaming() into machine code text on `output`."""
+        timer = start_phase(self.hook, "Assembler1", "pass2_streaming")
+        if timer:
+            spool, output = timer.file(spool), timer.file(output)
+        rows = read_spool(spool)
+        if timer:
+            rows = timer.count(rows)
+        output.writelines(self.machine_lines(rows))
+        if timer:
+            timer.finish(symbols=len(self.symtab), errors=len(self.errors))
+
+
+def read_spool(spool):
+    """Yields intermediate code rows from the binary file `spool`."""
+    while True:
+        chunk = spool.read(SPOOL_RECORD.size * SPOOL_CHUNK)
+        if not chunk:
+            return
+        yield from SPOOL_RECORD.iter_unpack(chunk)
 
 # --- Helper Functions ---
 
-def write_symtab():
+def write_symtab(assembler):
     """Writes the final SYMTAB to symtab.txt"""
     with open("symtab.txt", "w") as st:
         st.write("Symbol\tAddress\n")
         st.write("---------------\n")
-        for sym, addr in SYMTAB.items():
+        for sym, addr in assembler.symtab.items():
             st.write(f"{sym}\t{addr}\n")
 
-def write_intermediate():
+def write_intermediate(assembler):
     """Writes the INTERMEDIATE code to intermediate.txt"""
+    intermediate = assembler.intermediate
     with open("intermediate.txt", "w") as ic:
-        for line in INTERMEDIATE:
-            ic.write(str(line) + "\n")
+        for i in range(len(intermediate)):
+            ic.write(intermediate.format(i) + "\n")
 
 def setup_input_file():
     """Creates a sample input.asm file for testing."""
@@ -213,19 +366,46 @@ END
         f.write(asm_code)
 
 # --- Main Execution ---
+if __name__ == "__main__":
+    # 1. Create a sample input file
+    setup_input_file()
 
-# 1. Create a sample input file
-setup_input_file()
+    # --profile prints a timing and counter report after each pass
+    assembler = Assembler(hook=print if "--profile" in sys.argv else None)
+    # --object writes a binary machinecode.obj instead of machinecode.txt
+    output = "machinecode.obj" if "--object" in sys.argv else "machinecode.txt"
 
-# 2. Run Pass 1
-pass1()
+    if "--stream" in sys.argv:
+        # 2-3. Run Pass 1 and Pass 2 through an on-disk spool
+        with open("input.asm", "r") as f, open("intermediate.spool", "wb") as spool:
+            assembler.pass1_streaming(f, spool)
+        with open("intermediate.spool", "rb") as spool:
+            if output == "machinecode.obj":
+                with open(output, "wb") as obj:
+                    assembler.write_object(obj, read_spool(spool))
+            else:
+                with open(output, "w") as mc:
+                    assembler.pass2_streaming(spool, mc)
+        generated = "intermediate.spool"
+    else:
+        # 2. Run Pass 1
+        with open("input.asm", "r") as f:
+            assembler.pass1(f)
 
-# 3. Run Pass 2
-pass2()
+        # 3. Run Pass 2
+        if output == "machinecode.obj":
+            with open(output, "wb") as obj:
+                assembler.write_object(obj)
+        else:
+            with open(output, "w") as mc:
+                mc.write(assembler.pass2())
+        write_intermediate(assembler)
+        generated = "intermediate.txt"
 
-# 4. Write helper files
-write_symtab()
-write_intermediate()
+    # 4. Write helper files
+    write_symtab(assembler)
+    for error in assembler.errors:
+        print(error)
 
-print("✅ PASS-1 and PASS-2 Completed Successfully!")
-print("Generated Files: input.asm, symtab.txt, intermediate.txt, machinecode.txt")
+    print("✅ PASS-1 and PASS-2 Completed Successfully!" + (" (streaming)" if "--stream" in sys.argv else ""))
+    print(f"Generated Files: input.asm, symtab.txt, {generated}, {output}")
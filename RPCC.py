@@ -1,25 +1,266 @@
+import itertools
+import json
 import socket
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
 
-# Create TCP client socket
-s = socket.socket()
-s.connect(("localhost", 5000))
+from protocol import (CALL, FRAME, HELLO_BINARY, HELLO_FRAMED, HELLO_OK,
+                      KIND_BATCH, KIND_TEXT, MAX_BODY, OP_ADD, OP_BATCH, OP_SUB,
+                      RESULT, STATUS_BATCH, STATUS_OK, STATUS_TEXT, pack_batch,
+                      pack_batch_mixed, unpack_int64)
 
-print("---- RPC MENU ----")
-print("1. Add")
-print("2. Subtract")
+HOST = "localhost"
+PORT = 5000
 
-choice = input("Enter choice: ")
-a = input("Enter first number: ")
-b = input("Enter second number: ")
 
-# Prepare message
-message = choice + " " + a + " " + b
+def recv_exact_into(sock, view):
+    """Fills the writable memoryview from sock; raises ConnectionError on EOF."""
+    got = 0
+    while got < len(view):
+        count = sock.recv_into(view[got:])
+        if count == 0:
+            raise ConnectionError("Server closed the connection")
+        got += count
 
-# Send to server
-s.send(message.encode())
 
-# Receive result
-result = s.recv(1024).decode()
-print("Result from server:", result)
+def recv_exact(sock, n):
+    """Reads exactly n bytes from sock; raises ConnectionError on EOF."""
+    buf = bytearray(n)
+    recv_exact_into(sock, memoryview(buf))
+    return bytes(buf)
 
-s.close()
+
+# --- Client API ---
+
+class RPCClient:
+    """
+    One persistent connection to the RPC server, in framed mode or, with
+    binary=True, in binary mode (see protocol.py).
+
+    submit() sends a request and returns a Future right away, so many
+    requests can be in flight on the connection at once; a background
+    reader thread matches each reply to its Future by request id.
+    call() is the blocking form.
+    """
+
+    def __init__(self, host=HOST, port=PORT, timeout=None, binary=False):
+        self.binary = binary
+        self.sock = socket.create_connection((host, port), timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.sendall(HELLO_BINARY if binary else HELLO_FRAMED)
+        if recv_exact(self.sock, len(HELLO_OK)) != HELLO_OK:
+            self.sock.close()
+            raise ConnectionError("Server rejected the protocol handshake")
+        self.sock.settimeout(None)  # the reader thread blocks on recv
+
+        self._ids = itertools.count(1)
+        self._pending = {}  # request id -> Future
+        self._send_lock = threading.Lock()
+        self._send_buf = bytearray(CALL.size)  # reused by binary-mode sends
+        self._closed = False
+        target = self._read_loop_binary if binary else self._read_loop
+        self._reader = threading.Thread(target=target, daemon=True)
+        self._reader.start()
+
+    def submit(self, choice, a, b):
+        """
+        Sends one request and returns a Future for the reply text. In
+        binary mode a successful reply resolves to an int instead.
+        """
+        if not self.binary:
+            return self._send(KIND_TEXT, f"{choice} {a} {b}".encode())
+        future = Future()
+        with self._send_lock:
+            if self._closed:
+                raise ConnectionError("Client is closed")
+            req_id = next(self._ids) & 0xFFFFFFFF
+            # Pack first: arguments out of int64 range raise struct.error
+            # here and must not leave a future that nothing will resolve
+            CALL.pack_into(self._send_buf, 0, req_id, int(choice), int(a), int(b))
+            self._pending[req_id] = future
+            self.sock.sendall(self._send_buf)
+        return future
+
+    def submit_batch(self, op, a, b):
+        """
+        Sends one batch request applying OP_ADD or OP_SUB element-wise to
+        the int sequences a and b. The Future resolves to an array('q') of
+        results, or to the error text if the server rejected the batch.
+        """
+        return self._send(KIND_BATCH, pack_batch(op, a, b))
+
+    def submit_batch_mixed(self, triples):
+        """Like submit_batch() for a list of (op, a, b) triples."""
+        return self._send(KIND_BATCH, pack_batch_mixed(triples))
+
+    def _send(self, kind, body):
+        future = Future()
+        with self._send_lock:
+            if self._closed:
+                raise ConnectionError("Client is closed")
+            req_id = next(self._ids) & 0xFFFFFFFF
+            self._pending[req_id] = future
+            if self.binary:  # only batches come through here
+                header = CALL.pack(req_id, OP_BATCH, len(body), 0)
+            else:
+                header = FRAME.pack(req_id, len(body), kind)
+            self.sock.sendall(header + body)
+        return future
+
+    def call(self, choice, a, b, timeout=None):
+        """Sends one request and waits for the reply text."""
+        return self.submit(choice, a, b).result(timeout)
+
+    def add(self, a, b, timeout=None):
+        return int(self.call("1", a, b, timeout))
+
+    def sub(self, a, b, timeout=None):
+        return int(self.call("2", a, b, timeout))
+
+    def batch(self, op, a, b, timeout=None):
+        """Blocking form of submit_batch(); raises ValueError on rejection."""
+        return self._batch_result(self.submit_batch(op, a, b), timeout)
+
+    def batch_mixed(self, triples, timeout=None):
+        """Blocking form of submit_batch_mixed()."""
+        return self._batch_result(self.submit_batch_mixed(triples), timeout)
+
+    def add_many(self, a, b, timeout=None):
+        return self.batch(OP_ADD, a, b, timeout)
+
+    def sub_many(self, a, b, timeout=None):
+        return self.batch(OP_SUB, a, b, timeout)
+
+    @staticmethod
+    def _batch_result(future, timeout):
+        result = future.result(timeout)
+        if isinstance(result, str):
+            raise ValueError(result)
+        return result
+
+    def stats(self, timeout=None):
+        """Fetches the server's statistics (framed mode only)."""
+        if self.binary:
+            raise ValueError("Server stats need a framed-mode connection")
+        return json.loads(self._send(KIND_TEXT, b"stats").result(timeout))
+
+    def call_many(self, requests, timeout=None):
+        """
+        Pipelines a list of (choice, a, b) requests and returns the reply
+        texts in the same order.
+        """
+        futures = [self.submit(*request) for request in requests]
+        return [future.result(timeout) for future in futures]
+
+    def _read_loop(self):
+        error = None
+        try:
+            while True:
+                req_id, length, kind = FRAME.unpack(recv_exact(self.sock, FRAME.size))
+                if length > MAX_BODY:
+                    raise ConnectionError("Reply frame too large")
+                body = recv_exact(self.sock, length)
+                future = self._pending.pop(req_id, None)
+                if future is None:
+                    continue
+                if kind == KIND_BATCH:
+                    future.set_result(unpack_int64(body))
+                else:
+                    future.set_result(body.decode())
+        except (OSError, ConnectionError) as e:
+            error = e
+        self._fail_pending(error)
+
+    def _read_loop_binary(self):
+        # Replies are parsed straight out of one preallocated buffer; only
+        # batch results are copied out.
+        buf = bytearray(1 << 16)
+        view = memoryview(buf)
+        end = 0
+        error = None
+        try:
+            while True:
+                count = self.sock.recv_into(view[end:])
+                if count == 0:
+                    raise ConnectionError("Server closed the connection")
+                end += count
+
+                pos = 0
+                while end - pos >= RESULT.size:
+                    req_id, status, value = RESULT.unpack_from(buf, pos)
+                    pos += RESULT.size
+                    if status == STATUS_OK:
+                        result = value
+                    elif status == STATUS_BATCH:
+                        if value > MAX_BODY:
+                            raise ConnectionError("Reply frame too large")
+                        if end - pos >= value:
+                            result = unpack_int64(view[pos:pos + value])
+                            pos += value
+                        else:
+                            rest = recv_exact(self.sock, value - (end - pos))
+                            result = unpack_int64(bytes(view[pos:end]) + rest)
+                            pos = end
+                    else:
+                        result = STATUS_TEXT.get(status, "Invalid Request")
+                    future = self._pending.pop(req_id, None)
+                    if future is not None:
+                        future.set_result(result)
+
+                # Move the partial record, if any, to the front
+                view[:end - pos] = view[pos:end]
+                end -= pos
+        except (OSError, ConnectionError) as e:
+            error = e
+        self._fail_pending(error)
+
+    def _fail_pending(self, error):
+        with self._send_lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(ConnectionError(f"Connection lost: {error}"))
+
+    @property
+    def closed(self):
+        """True once the connection has been closed or lost."""
+        return self._closed
+
+    def ping(self, timeout=None):
+        """Health check: one cheap round trip. Returns True if it answers."""
+        try:
+            return self.add(0, 0, timeout) == 0
+        except (OSError, ValueError, FutureTimeout):
+            return False
+
+    def close(self):
+        with self._send_lock:
+            self._closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        self._reader.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Main Execution Block ---
+if __name__ == "__main__":
+    print("---- RPC MENU ----")
+    print("1. Add")
+    print("2. Subtract")
+
+    choice = input("Enter choice: ")
+    a = input("Enter first number: ")
+    b = input("Enter second number: ")
+
+    with RPCClient() as client:
+        result = client.call(choice, a, b)
+    print("Result from server:", result)
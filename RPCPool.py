@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from RPCC import HOST, PORT, RPCClient
+from protocol import OP_ADD, OP_SUB
+
+# --- Connection Pool ---
+
+class RPCPool:
+    """
+    A bounded pool of RPCClient connections to one server, safe to share
+    between threads and usable from asyncio.
+
+    At most `size` connections exist at once; callers beyond that wait
+    for one to be released. Connections idle for longer than
+    `idle_timeout` seconds are closed, and one idle for longer than
+    `check_after` seconds is pinged before it is handed out again. Every
+    call is bounded by `call_timeout`; a connection whose call timed out
+    is discarded, since the server may be wedged on it.
+    """
+
+    def __init__(self, host=HOST, port=PORT, size=8, binary=False,
+                 call_timeout=5.0, connect_timeout=5.0,
+                 idle_timeout=60.0, check_after=5.0):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.binary = binary
+        self.call_timeout = call_timeout
+        self.connect_timeout = connect_timeout
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = deque()  # (client, last used), most recent on the right
+        self._closed = False
+
+    # --- Checkout ---
+
+    def acquire(self, timeout=None):
+        """Checks out a healthy connection, opening one if none is idle."""
+        if not self._slots.acquire(timeout=self.connect_timeout if timeout is None else timeout):
+            raise FutureTimeout("No pooled connection became free in time")
+        try:
+            while True:
+                with self._lock:
+                    if self._closed:
+                        raise ConnectionError("Pool is closed")
+                    self._evict_idle_locked()
+                    client, last_used = self._idle.pop() if self._idle else (None, 0)
+                if client is None:
+                    return RPCClient(self.host, self.port, self.connect_timeout, self.binary)
+                if client.closed:
+                    continue
+                if time.monotonic() - last_used < self.check_after or client.ping(self.call_timeout):
+                    return client
+                client.close()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, client, discard=False):
+        """Returns a connection to the pool, or closes it if discard is set."""
+        with self._lock:
+            if discard or client.closed or self._closed:
+                client.close()
+            else:
+                self._idle.append((client, time.monotonic()))
+        self._slots.release()
+
+    def evict_idle(self):
+        """Closes connections idle for longer than idle_timeout."""
+        with self._lock:
+            self._evict_idle_locked()
+
+    def _evict_idle_locked(self):
+        deadline = time.monotonic() - self.idle_timeout
+        while self._idle and self._idle[0][1] < deadline:
+            client, _ = self._idle.popleft()
+            client.close()
+
+    # --- Calls ---
+
+    def call(self, choice, a, b, timeout=None):
+        """One call on a pooled connection; returns the reply as RPCClient does."""
+        timeout = self.call_timeout if timeout is None else timeout
+        client = self.acquire()
+        discard = False
+        try:
+            return client.call(choice, a, b, timeout)
+        except (FutureTimeout, OSError):
+            discard = True
+            raise
+        finally:
+            self.release(client, discard)
+
+    def add(self, a, b, timeout=None):
+        return int(self.call("1", a, b, timeout))
+
+    def sub(self, a, b, timeout=None):
+        return int(self.call("2", a, b, timeout))
+
+    def batch(self, op, a, b, timeout=None):
+        """One batch call (see RPCClient.batch) on a pooled connection."""
+        timeout = self.call_timeout if timeout is None else timeout
+        client = self.acquire()
+        discard = False
+        try:
+            return client.batch(op, a, b, timeout)
+        except (FutureTimeout, OSError):
+            discard = True
+            raise
+        finally:
+            self.release(client, discard)
+
+    def add_many(self, a, b, timeout=None):
+        return self.batch(OP_ADD, a, b, timeout)
+
+    def sub_many(self, a, b, timeout=None):
+        return self.batch(OP_SUB, a, b, timeout)
+
+    def map(self, requests, timeout=None):
+        """
+        Fans a list of (choice, a, b) requests out over up to `size`
+        connections, pipelining on each, and returns the replies in
+        order. `timeout` bounds each reply.
+        """
+        timeout = self.call_timeout if timeout is None else timeout
+        if not requests:
+            return []
+        clients = []
+        failed = set()
+        try:
+            clients.append(self.acquire())
+            # Take more connections only if they are free (and open) right now
+            while len(clients) < min(self.size, len(requests)):
+                try:
+                    clients.append(self.acquire(timeout=0))
+                except (FutureTimeout, OSError):
+                    break
+
+            futures = [clients[i % len(clients)].submit(*request)
+                       for i, request in enumerate(requests)]
+            results = []
+            for i, future in enumerate(futures):
+                try:
+                    results.append(future.result(timeout))
+                except (FutureTimeout, OSError):
+                    failed.add(i % len(clients))
+                    raise
+            return results
+        finally:
+            for i, client in enumerate(clients):
+                self.release(client, i in failed)
+
+    async def acall(self, choice, a, b, timeout=None):
+        """asyncio form of call(); the blocking parts run in a worker thread."""
+        return await asyncio.to_thread(self.call, choice, a, b, timeout)
+
+    async def amap(self, requests, timeout=None):
+        """asyncio form of map()."""
+        return await asyncio.to_thread(self.map, requests, timeout)
+
+    # --- Shutdown ---
+
+    def close(self):
+        """Closes idle connections; checked-out ones close on release."""
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                client, _ = self._idle.pop()
+                client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
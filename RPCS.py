@@ -1,37 +1,619 @@
-import socket
+import argparse
+import asyncio
+import json
+import os
+import signal
+import struct
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
+from histogram import LatencyHistogram
+
+from protocol import (BATCH, CALL, FRAME, HELLO_BINARY, HELLO_FRAMED,
+                      HELLO_OK, KIND_BATCH, KIND_TEXT, MAX_BODY, OP_ADD,
+                      OP_BATCH, OP_MIXED, OP_SUB, RESULT, STATUS_BAD_OP,
+                      STATUS_BAD_REQUEST, STATUS_BATCH, STATUS_OK, pack_int64,
+                      unpack_int64)
+
+try:
+    import numpy as np
+except ImportError:  # batches fall back to plain Python loops
+    np = None
+
+HOST = "localhost"
+PORT = 5000
+BACKLOG = 1024          # pending connections queued by the kernel
+SHUTDOWN_GRACE = 5.0    # seconds open connections get to finish on shutdown
+PROCESS_WORKERS = os.cpu_count() or 1
+PRIMES_LIMIT = 10_000_000  # largest b "primes" accepts; its sieve takes b bytes
+
+# --- Method Registry ---
+# Methods are looked up by name ("add") or by id, as a string in text
+# requests ("1") and as an int in binary requests (1).
+METHODS = {}
+METHODS_BY_ID = {}
+
+_MISS = object()
+_process_pool = None
+
+
+class Method:
+    """
+    A registered RPC method. CPU-bound methods run in a process pool so
+    they neither block the event loop nor hold the GIL against cheap
+    calls. With cache_size > 0 the method is treated as pure and its
+    most recent results are kept in an LRU cache. `check`, if given, is
+    called with the arguments first and raises ValueError to reject them
+    before any work is done.
+    """
+    __slots__ = ("name", "id", "func", "cpu_bound", "cache", "cache_size", "check")
+
+    def __init__(self, name, method_id, func, cpu_bound=False, cache_size=0, check=None):
+        self.name = name
+        self.id = method_id
+        self.func = func
+        self.cpu_bound = cpu_bound
+        self.cache_size = cache_size
+        self.cache = OrderedDict() if cache_size else None
+        self.check = check
+
+    def __call__(self, a, b):
+        """Runs the method inline; use call_async() for CPU-bound ones."""
+        if self.check is not None:
+            self.check(a, b)
+        if self.cache is None:
+            return self.func(a, b)
+        result = self._lookup(a, b)
+        if result is _MISS:
+            result = self.func(a, b)
+            self._store(a, b, result)
+        return result
+
+    async def call_async(self, a, b):
+        """Runs the method in the process pool, consulting the cache first."""
+        if self.check is not None:
+            self.check(a, b)
+        if self.cache is not None:
+            result = self._lookup(a, b)
+            if result is not _MISS:
+                return result
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(get_process_pool(), self.func, a, b)
+        if self.cache is not None:
+            self._store(a, b, result)
+        return result
+
+    def _lookup(self, a, b):
+        result = self.cache.get((a, b), _MISS)
+        if result is not _MISS:
+            self.cache.move_to_end((a, b))
+        return result
+
+    def _store(self, a, b, result):
+        self.cache[(a, b)] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+
+def register(name, method_id, cpu_bound=False, cache_size=0, check=None):
+    """
+    Decorator registering func(a, b) as an RPC method under `name` and
+    the integer `method_id`. The function itself is returned unchanged,
+    so it stays picklable for the process pool.
+    """
+    def decorator(func):
+        if name in METHODS or method_id in METHODS_BY_ID:
+            raise ValueError(f"RPC method '{name}' ({method_id}) already registered")
+        method = Method(name, method_id, func, cpu_bound, cache_size, check)
+        METHODS[name] = METHODS[str(method_id)] = method
+        METHODS_BY_ID[method_id] = method
+        return func
+    return decorator
+
+
+def get_process_pool():
+    """Returns the shared process pool for CPU-bound methods, creating it on first use."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(PROCESS_WORKERS)
+    return _process_pool
+
+
+# --- Methods ---
+
+@register("add", 1)
 def add(a, b):
     return a + b
 
+@register("sub", 2)
 def sub(a, b):
     return a - b
 
-# Create TCP server socket
-s = socket.socket()
-s.bind(("localhost", 5000))
-s.listen(1)
+def check_primes(a, b):
+    if b > PRIMES_LIMIT:
+        raise ValueError(f"primes: b must be at most {PRIMES_LIMIT}")
+
+@register("primes", 3, cpu_bound=True, cache_size=1024, check=check_primes)
+def count_primes(a, b):
+    """Counts the primes in [a, b)."""
+    if b <= 2 or b <= a:
+        return 0
+    sieve = bytearray([1]) * b
+    sieve[0:2] = b"\x00\x00"
+    for i in range(2, int(b ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, b, i)))
+    return sum(sieve[max(a, 0):])
+
+# --- Statistics ---
+
+class ServerStats:
+    """
+    Server-wide counters and latency histograms. Latencies are in
+    nanoseconds, split into decode (parsing a request), dispatch (running
+    the method) and encode (building the reply), so a slowdown can be
+    pinned on the parser, the handlers or the socket layer.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.calls = Counter()   # method name -> requests served
+        self.errors = 0          # malformed requests and failed calls
+        self.connections = 0     # open connections
+        self.in_flight = 0       # calls waiting on the process pool
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.decode = LatencyHistogram()
+        self.dispatch = LatencyHistogram()
+        self.encode = LatencyHistogram()
+
+    def snapshot(self):
+        """Returns the current figures as a JSON-serialisable dict."""
+        uptime = time.monotonic() - self.started
+        total = sum(self.calls.values())
+        return {
+            "uptime_s": round(uptime, 3),
+            "requests": total,
+            "requests_per_s": round(total / uptime, 1) if uptime else 0.0,
+            "calls": dict(self.calls),
+            "errors": self.errors,
+            "connections": self.connections,
+            "in_flight": self.in_flight,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "decode_ns": self.decode.summary(),
+            "dispatch_ns": self.dispatch.summary(),
+            "encode_ns": self.encode.summary(),
+        }
+
+
+STATS = ServerStats()
+STATS_REQUEST = "stats"   # reserved text request answered with STATS as JSON
+
+now = time.perf_counter_ns
+
+# --- Request Handling ---
+
+def parse_request(data):
+    """
+    Parses one text request ("choice a b") into (method, a, b). Returns
+    the error reply text instead if it is malformed or names no method.
+    """
+    try:
+        choice, a, b = data.split()
+        a = int(a)
+        b = int(b)
+    except ValueError:
+        return "Invalid Request"
+
+    method = METHODS.get(choice)
+    if method is None:
+        return "Invalid Operation"
+    return method, a, b
+
+
+def decode_text(data):
+    """
+    parse_request() with decode timing and call counting. The reserved
+    stats request is answered here, with the reply text.
+    """
+    start = now()
+    if data.strip() == STATS_REQUEST:
+        return json.dumps(STATS.snapshot())
+    parsed = parse_request(data)
+    STATS.decode.record(now() - start)
+    if isinstance(parsed, str):
+        STATS.errors += 1
+    else:
+        STATS.calls[parsed[0].name] += 1
+    return parsed
+
+
+def run_method(method, a, b):
+    """Runs a method inline and returns the reply text."""
+    start = now()
+    result = method(a, b)
+    middle = now()
+    reply = str(result)
+    STATS.dispatch.record(middle - start)
+    STATS.encode.record(now() - middle)
+    return reply
+
+
+async def run_method_async(method, a, b):
+    """Runs a CPU-bound method in the process pool and returns the reply text."""
+    STATS.in_flight += 1
+    start = now()
+    try:
+        result = await method.call_async(a, b)
+    except Exception:
+        STATS.errors += 1
+        return "Invalid Request"
+    finally:
+        STATS.in_flight -= 1
+    middle = now()
+    reply = str(result)
+    STATS.dispatch.record(middle - start)
+    STATS.encode.record(now() - middle)
+    return reply
+
+
+async def handle_request(data):
+    """
+    Parses and runs one text request and returns the reply text.
+    """
+    parsed = decode_text(data)
+    if isinstance(parsed, str):
+        return parsed
+    method, a, b = parsed
+    if method.cpu_bound:
+        return await run_method_async(method, a, b)
+    return run_method(method, a, b)
+
+
+async def finish_tasks(tasks):
+    """Waits for a connection's outstanding CPU-bound replies."""
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def wrap64(value):
+    """Wraps a Python int to signed 64 bits, matching NumPy int64."""
+    return ((value + (1 << 63)) & 0xFFFFFFFFFFFFFFFF) - (1 << 63)
+
+
+def handle_batch(body):
+    """
+    Evaluates a packed batch request (see protocol.py) and returns
+    (reply kind, reply body). Uses NumPy when it is installed.
+    """
+    try:
+        op, count = BATCH.unpack_from(body)
+    except struct.error:
+        return KIND_TEXT, b"Invalid Request"
+    ops_size = count if op == OP_MIXED else 0
+    if len(body) != BATCH.size + ops_size + 16 * count:
+        return KIND_TEXT, b"Invalid Request"
+    if op not in (OP_MIXED, OP_ADD, OP_SUB):
+        return KIND_TEXT, b"Invalid Operation"
+
+    start = BATCH.size + ops_size
+    if np is not None:
+        ops = np.frombuffer(body, np.uint8, ops_size, BATCH.size)
+        a = np.frombuffer(body, ">i8", count, start)
+        b = np.frombuffer(body, ">i8", count, start + 8 * count)
+        if op == OP_ADD:
+            result = a + b
+        elif op == OP_SUB:
+            result = a - b
+        elif ((ops != OP_ADD) & (ops != OP_SUB)).any():
+            return KIND_TEXT, b"Invalid Operation"
+        else:
+            result = np.where(ops == OP_ADD, a + b, a - b)
+        return KIND_BATCH, result.astype(">i8", copy=False).tobytes()
+
+    ops = body[BATCH.size:start] if op == OP_MIXED else bytes([op]) * count
+    if any(o != OP_ADD and o != OP_SUB for o in ops):
+        return KIND_TEXT, b"Invalid Operation"
+    a = unpack_int64(body[start:start + 8 * count])
+    b = unpack_int64(body[start + 8 * count:])
+    result = [wrap64(x + y if o == OP_ADD else x - y) for o, x, y in zip(ops, a, b)]
+    return KIND_BATCH, pack_int64(result)
+
+
+def run_batch(body):
+    """handle_batch() with dispatch timing and call counting."""
+    start = now()
+    kind, reply = handle_batch(body)
+    STATS.dispatch.record(now() - start)
+    if kind == KIND_BATCH:
+        STATS.calls["batch"] += 1
+    else:
+        STATS.errors += 1
+    return kind, reply
+
+
+async def handle_framed(reader, writer, idle=None):
+    """
+    Serves a connection that negotiated framed mode: FRAME header plus
+    body per request, replies carry the request id they answer. Calls to
+    CPU-bound methods are answered from their own task, so cheap calls
+    pipelined behind them are not held up.
+    """
+    task = asyncio.current_task()
+    running = set()
+
+    async def reply_later(req_id, method, a, b):
+        reply = (await run_method_async(method, a, b)).encode()
+        STATS.bytes_out += FRAME.size + len(reply)
+        writer.write(FRAME.pack(req_id, len(reply), KIND_TEXT) + reply)
+
+    try:
+        while True:
+            if idle is not None:
+                idle.add(task)
+            try:
+                header = await reader.readexactly(FRAME.size)
+            except asyncio.IncompleteReadError:
+                break  # client closed the connection
+            finally:
+                if idle is not None:
+                    idle.discard(task)
+            req_id, length, kind = FRAME.unpack(header)
+            if length > MAX_BODY:
+                break  # corrupt or hostile stream; drop the connection
+            body = await reader.readexactly(length)
+            STATS.bytes_in += FRAME.size + length
+
+            if kind == KIND_TEXT:
+                parsed = decode_text(body.decode())
+                if isinstance(parsed, str):
+                    reply_kind, reply = KIND_TEXT, parsed.encode()
+                elif parsed[0].cpu_bound:
+                    pending = asyncio.create_task(reply_later(req_id, *parsed))
+                    running.add(pending)
+                    pending.add_done_callback(running.discard)
+                    continue
+                else:
+                    reply_kind, reply = KIND_TEXT, run_method(*parsed).encode()
+            elif kind == KIND_BATCH:
+                reply_kind, reply = run_batch(body)
+            else:
+                STATS.errors += 1
+                reply_kind, reply = KIND_TEXT, b"Invalid Request"
+            STATS.bytes_out += FRAME.size + len(reply)
+            writer.write(FRAME.pack(req_id, len(reply), reply_kind) + reply)
+            await writer.drain()
+    finally:
+        await finish_tasks(running)
+
+
+async def handle_binary(reader, writer, idle=None):
+    """
+    Serves a connection that negotiated binary mode. Each read takes
+    whatever the socket has buffered and answers every complete CALL
+    record in it with one write, so pipelined requests cost one await
+    per chunk rather than per request. CPU-bound methods reply from their
+    own task, as in framed mode.
+    """
+    task = asyncio.current_task()
+    running = set()
+
+    async def reply_later(req_id, method, a, b):
+        STATS.in_flight += 1
+        start = now()
+        try:
+            result = await method.call_async(a, b)
+        except Exception:
+            STATS.errors += 1
+            writer.write(RESULT.pack(req_id, STATUS_BAD_REQUEST, 0))
+        else:
+            STATS.dispatch.record(now() - start)
+            writer.write(RESULT.pack(req_id, STATUS_OK, wrap64(result)))
+        finally:
+            STATS.in_flight -= 1
+        STATS.bytes_out += RESULT.size
+
+    buf = bytearray()
+    try:
+        while True:
+            if idle is not None:
+                idle.add(task)
+            data = await reader.read(1 << 16)
+            if idle is not None:
+                idle.discard(task)
+            if not data:
+                break  # client closed the connection
+            STATS.bytes_in += len(data)
+            buf += data
+
+            replies = []
+            pos = 0
+            with memoryview(buf) as view:
+                while len(buf) - pos >= CALL.size:
+                    start = now()
+                    req_id, op, a, b = CALL.unpack_from(buf, pos)
+                    if op != OP_BATCH:
+                        pos += CALL.size
+                        method = METHODS_BY_ID.get(op)
+                        decoded = now()
+                        STATS.decode.record(decoded - start)
+                        if method is None:
+                            STATS.errors += 1
+                            replies.append(RESULT.pack(req_id, STATUS_BAD_OP, 0))
+                            continue
+                        STATS.calls[method.name] += 1
+                        if method.cpu_bound:
+                            pending = asyncio.create_task(reply_later(req_id, method, a, b))
+                            running.add(pending)
+                            pending.add_done_callback(running.discard)
+                            continue
+                        result = method(a, b)
+                        dispatched = now()
+                        replies.append(RESULT.pack(req_id, STATUS_OK, wrap64(result)))
+                        STATS.dispatch.record(dispatched - decoded)
+                        STATS.encode.record(now() - dispatched)
+                        continue
+
+                    if not 0 <= a <= MAX_BODY:
+                        return  # corrupt or hostile stream; drop the connection
+                    if len(buf) - pos - CALL.size < a:
+                        break  # wait for the rest of the batch body
+                    body = view[pos + CALL.size:pos + CALL.size + a]
+                    pos += CALL.size + a
+                    kind, reply = run_batch(body)
+                    if kind == KIND_BATCH:
+                        replies.append(RESULT.pack(req_id, STATUS_BATCH, len(reply)))
+                        replies.append(reply)
+                    elif reply == b"Invalid Operation":
+                        replies.append(RESULT.pack(req_id, STATUS_BAD_OP, 0))
+                    else:
+                        replies.append(RESULT.pack(req_id, STATUS_BAD_REQUEST, 0))
+                    body.release()
+            del buf[:pos]
+
+            if replies:
+                reply = b"".join(replies)
+                STATS.bytes_out += len(reply)
+                writer.write(reply)
+                await writer.drain()
+    finally:
+        await finish_tasks(running)
+
+
+async def handle_client(reader, writer, idle=None):
+    """
+    Serves one client connection until the client disconnects or the
+    server shuts down. Line mode carries one request per line; a first
+    line of HELLO_FRAMED or HELLO_BINARY switches the connection to framed
+    or binary mode. While waiting for the next request the task sits in
+    `idle`, so shutdown can close it without waiting.
+    """
+    task = asyncio.current_task()
+    first = True
+    STATS.connections += 1
+    try:
+        while True:
+            if idle is not None:
+                idle.add(task)
+            try:
+                line = await reader.readline()
+            except ValueError:
+                # Line over the stream limit; the rest of it may still be
+                # on its way, so reject it and drop the connection
+                STATS.errors += 1
+                writer.write(b"Invalid Request\n")
+                break
+            finally:
+                if idle is not None:
+                    idle.discard(task)
+            if not line:
+                break  # client closed the connection
+            if first and line == HELLO_FRAMED:
+                writer.write(HELLO_OK)
+                await handle_framed(reader, writer, idle)
+                break
+            if first and line == HELLO_BINARY:
+                writer.write(HELLO_OK)
+                await handle_binary(reader, writer, idle)
+                break
+            first = False
+            reply = (await handle_request(line.decode())).encode() + b"\n"
+            STATS.bytes_in += len(line)
+            STATS.bytes_out += len(reply)
+            writer.write(reply)
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        STATS.connections -= 1
+        if idle is not None:
+            idle.discard(task)
+        writer.close()
+
+
+# --- Server ---
+
+async def dump_stats(interval):
+    """Prints STATS as one JSON line every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        print(json.dumps(STATS.snapshot()), flush=True)
+
+
+async def serve(host=HOST, port=PORT, backlog=BACKLOG, stop=None,
+                stats_interval=None, ready=None):
+    """
+    Runs the RPC server until `stop` (an asyncio.Event) is set, or until
+    SIGINT/SIGTERM when no event is given. Idle connections are closed
+    straight away; busy ones get SHUTDOWN_GRACE seconds to finish. With
+    `stats_interval` set, STATS is printed every that many seconds.
+    `ready`, if given, is called with the list of listening addresses
+    once connections are accepted (with port=0, that tells the port).
+    """
+    global _process_pool
+    clients = set()
+    idle = set()
+
+    async def on_connect(reader, writer):
+        task = asyncio.current_task()
+        clients.add(task)
+        try:
+            await handle_client(reader, writer, idle)
+        except asyncio.CancelledError:
+            pass  # closed by shutdown; nothing left to report
+        finally:
+            clients.discard(task)
+
+    if stop is None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # e.g. Windows, or not the main thread
+
+    server = await asyncio.start_server(on_connect, host, port, backlog=backlog)
+    addresses = [sock.getsockname() for sock in server.sockets]
+    print("RPC Server started on", ", ".join(str(address) for address in addresses))
+    if ready is not None:
+        ready(addresses)
 
-print("RPC Server started... Waiting for client...")
+    dumper = None
+    if stats_interval:
+        dumper = asyncio.create_task(dump_stats(stats_interval))
 
-conn, addr = s.accept()
-print("Client connected:", addr)
+    async with server:
+        await stop.wait()
+        if dumper is not None:
+            dumper.cancel()
 
-# Receive data from client
-data = conn.recv(1024).decode()
-choice, a, b = data.split()
-a = int(a)
-b = int(b)
+        # Stop accepting, then let in-flight clients drain
+        server.close()
+        print("RPC Server shutting down...")
+        for task in list(idle):
+            task.cancel()
+        if clients:
+            done, pending = await asyncio.wait(set(clients), timeout=SHUTDOWN_GRACE)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
 
-# Perform operation
-if choice == "1":
-    result = add(a, b)
-elif choice == "2":
-    result = sub(a, b)
-else:
-    result = "Invalid Operation"
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
 
-# Send result back to client
-conn.send(str(result).encode())
 
-conn.close()
-s.close()
+# --- Main Execution Block ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RPC server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--backlog", type=int, default=BACKLOG)
+    parser.add_argument("--stats-interval", type=float, default=None,
+                        help="print server stats every N seconds")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.backlog,
+                      stats_interval=args.stats_interval))
@@ -1,3 +1,15 @@
+import re
+from collections import deque
+
+from ir import AD, CLASS_CODES, CONST, DL, IS, LIT, NONE, REG, SYM, IntermediateCode
+from objfile import ObjectFile, ObjectWriter
+from passhooks import start_phase
+
+try:
+    import numpy as np
+except ImportError:  # pass2_array() is unavailable, pass2() still works
+    np = None
+
 # --- Constant Tables ---
 OPTAB = {
     'STOP':  ('IS', '00'), 'ADD':   ('IS', '01'), 'SUB':   ('IS', '02'),
@@ -6,18 +18,124 @@ OPTAB = {
     'READ':  ('IS', '09'), 'PRINT': ('IS', '10'),
     'START': ('AD', '01'), 'END':   ('AD', '02'), 'ORIGIN':('AD', '03'),
     'EQU':   ('AD', '04'), 'LTORG': ('AD', '05'),
+    'ENTRY': ('AD', '06'), 'EXTRN': ('AD', '07'),
     'DC':    ('DL', '01'), 'DS':    ('DL', '02')
 }
 REGTAB = {'AREG': 1, 'BREG': 2, 'CREG': 3, 'DREG': 4}
 CONDTAB = {'LT': 1, 'LE': 2, 'EQ': 3, 'GT': 4, 'GE': 5, 'ANY': 6}
 
+# OPTAB as IR codes: Mnemonic: (class, opcode number)
+OPCODES = {name: (CLASS_CODES[cls], int(num)) for name, (cls, num) in OPTAB.items()}
+
+
+# --- Operand Classes ---
+# A constant operand is an ASCII decimal integer; anything else that is
+# not a register, condition or literal is a symbol. is_int(op) returns a
+# match (true) or None, without int()'s exceptions and without taking
+# other digits (X²) or underscores as numbers.
+is_int = re.compile(r"[+-]?[0-9]+").fullmatch
+
+def constant(op, error=print):
+    """
+    Value of a DC operand ('5') or literal (='5'). One that is not a
+    decimal integer is reported through error() and assembles as 0.
+    """
+    text = op.lstrip('=').strip("'")
+    if is_int(text):
+        return int(text)
+    error(f"Error: Invalid constant {op}")
+    return 0
+
+
+# --- Source Tokenizer ---
+# A source line is "[label] opcode [op1[, op2]]"; a leading token that is
+# not a mnemonic is the label. LINE_RE picks up to four tokens from every
+# non-blank line of the text in one findall() call.
+LINE_RE = re.compile(r"^[ \t]*([^\s,]+)(?:[ \t,]+([^\s,]+))?(?:[ \t,]+([^\s,]+))?(?:[ \t,]+([^\s,]+))?",
+                     re.MULTILINE)
+
+def tokenize(source):
+    """Yields (label, opcode, op1, op2) for each non-blank line of assembly text."""
+    for first, second, third, fourth in LINE_RE.findall(source):
+        if first in OPTAB:
+            yield '', first, second, third
+        else:
+            yield first, second, third, fourth
+
+
+# --- Literal Pools ---
+class LiteralPool:
+    """
+    The literals waiting for the next LTORG or END, in order of first use.
+    They are kept in a dict (literal -> LITTAB index), so adding and
+    membership are O(1) however large the pool grows, and place() assigns
+    all their addresses in one pass over it.
+
+    With dedup=True, literals with the same value spelled differently
+    (='5', ='05', ='+5') share one word when placed together.
+    """
+    __slots__ = ("dedup", "pending")
+
+    def __init__(self, dedup=False):
+        self.dedup = dedup
+        self.pending = {}
+
+    def __len__(self):
+        return len(self.pending)
+
+    def __contains__(self, literal):
+        return literal in self.pending
+
+    def __iter__(self):
+        return iter(self.pending)
+
+    def add(self, literal, index):
+        self.pending.setdefault(literal, index)
+
+    def place(self, littab, lc, error=print):
+        """
+        Gives each pending literal still without an address the next word
+        from `lc` and empties the pool. Literals placed in an earlier pool
+        keep their address. error() is as for constant().
+        Returns: (LITTAB indexes given an address, values of the words laid out from lc)
+        """
+        placed = []
+        values = []
+        addresses = {} # value -> address, with dedup
+        for literal, index in self.pending.items():
+            entry = littab[index]
+            if entry[1] != -1:
+                continue
+            value = constant(literal, error)
+            if self.dedup and value in addresses:
+                entry[1] = addresses[value]
+            else:
+                entry[1] = addresses[value] = lc + len(values)
+                values.append(value)
+            placed.append(index)
+        self.pending.clear()
+        return placed, values
+
 
 # --- Pass 1 Function ---
-def pass1(assembly_code):
+# Operands whose encoding never changes: Register or condition code
+FIXED_OPERANDS = {op: (REG, code) for op, code in (*REGTAB.items(), *CONDTAB.items())}
+IS_CODES = {name: num for name, (cls, num) in OPCODES.items() if cls == IS}
+
+def pass1(assembly_code, hook=None, dedup_literals=False):
     """
-    Performs Pass 1 of the assembler.
+    Performs Pass 1 of the assembler. `assembly_code` is assembly text or
+    a list of [label, opcode, op1, op2] lines. With `hook`, it is called
+    with a passhooks.PhaseReport at the end. dedup_literals is as for
+    LiteralPool.
     Returns: symtab, littab, pooltab, intermediate_code
     """
+    timer = start_phase(hook, "ass", "pass1")
+    if isinstance(assembly_code, str):
+        assembly_code = tokenize(assembly_code)
+    if timer:
+        assembly_code = timer.count(assembly_code)
+
     symtab_map = {}
     symtab = []
 
@@ -26,193 +144,453 @@ def pass1(assembly_code):
 
     pooltab = [0] # Pool 0 starts at LITTAB index 0
     
-    # This list tracks literals that are pending for the *current* pool
-    unassigned_literals_in_pool = [] 
+    # Literals that are pending for the *current* pool
+    pool = LiteralPool(dedup_literals)
+    add_literal = pool.add
 
-    intermediate_code = []
+    intermediate_code = IntermediateCode()
+    emit = intermediate_code.append
     lc = 0
+    forward_refs = 0 # Symbols used before their definition
 
-    for line in assembly_code:
-        label, opcode, op1, op2 = line
-        ic = []
+    def define(label):
+        nonlocal forward_refs
+        if label not in symtab_map:
+            symtab_map[label] = len(symtab)
+            symtab.append([label, lc])
+        else:
+            # Update address for a forward reference
+            if symtab[symtab_map[label]][1] == -1:
+                symtab[symtab_map[label]][1] = lc
+                forward_refs += 1
+            else: # Re-definition of a symbol
+                print(f"Error: Duplicate symbol '{label}'")
 
-        if label:
-            if label not in symtab_map:
-                symtab_map[label] = len(symtab)
-                symtab.append([label, lc])
-            else:
-                # Update address for a forward reference
-                if symtab[symtab_map[label]][1] == -1:
-                    symtab[symtab_map[label]][1] = lc
-                else: # Re-definition of a symbol
-                    print(f"Error: Duplicate symbol '{label}'")
+    def encode_operand(op):
+        fixed = FIXED_OPERANDS.get(op)
+        if fixed is not None:
+            return fixed
+        elif op[0] == '=':
+            if op not in littab_map:
+                littab_map[op] = len(littab)
+                littab.append([op, -1]) 
+            
+            add_literal(op, littab_map[op])
+            return LIT, littab_map[op]
+        
+        elif op in symtab_map:
+            return SYM, symtab_map[op]
+        elif is_int(op):
+            return CONST, int(op)
+        else:
+            # symbol with forward reference
+            symtab_map[op] = len(symtab)
+            symtab.append([op, -1])
+            return SYM, symtab_map[op]
 
-        if opcode == 'START':
-            if op1:
-                lc = int(op1)
-            ic = [lc, (OPTAB[opcode][0], OPTAB[opcode][1]), ('C', lc)]
+    # --- Statement Handlers ---
+    # Each takes the line's fields; END returns True to stop the pass.
+    def start(label, opcode, op1, op2):
+        nonlocal lc
+        if op1:
+            lc = int(op1)
+        emit(lc, AD, 1, CONST, lc)
 
-        elif opcode == 'EQU':
-            # This assumes backward reference for EQU
-            symtab[symtab_map[label]][1] = symtab[symtab_map[op1]][1]
-            ic = [lc, ('AD', '04'), ('S', symtab_map[op1])]
+    def equ(label, opcode, op1, op2):
+        # This assumes backward reference for EQU
+        symtab[symtab_map[label]][1] = symtab[symtab_map[op1]][1]
+        emit(lc, AD, 4, SYM, symtab_map[op1])
 
-        elif opcode in ('LTORG', 'END'):
-            ic = [lc, OPTAB[opcode]]
-            intermediate_code.append(ic) # Add the LTORG/END directive itself
-
-            if unassigned_literals_in_pool:
-                # Process all pending literals for this pool
-                for literal in unassigned_literals_in_pool:
-                    lit_index = littab_map[literal]
-                    if littab[lit_index][1] == -1: # If address not assigned
-                        littab[lit_index][1] = lc
-                        # Add literal definition to IC (like a DC)
-                        value = literal.strip("='")
-                        intermediate_code.append([lc, ('DL', '01'), ('C', value)])
-                        lc += 1
-                
-                # Mark the start of the *next* pool
-                pooltab.append(len(littab))
-                unassigned_literals_in_pool = [] # Clear the pool
+    def place_pool(label, opcode, op1, op2):
+        # LTORG and END
+        nonlocal lc
+        emit(lc, *OPCODES[opcode]) # Add the LTORG/END directive itself
+
+        if pool:
+            # Assign all pending literals of this pool at once and add
+            # their definitions to IC (like a DC)
+            _, values = pool.place(littab, lc)
+            intermediate_code.extend((lc + i, DL, 1, CONST, value) for i, value in enumerate(values))
+            lc += len(values)
             
-            if opcode == 'END':
-                break # Stop processing
-            continue # Skip adding this to IC again
+            # Mark the start of the *next* pool
+            pooltab.append(len(littab))
+        
+        return opcode == 'END' # Stop processing
 
-        elif opcode == 'ORIGIN':
-            if '+' in op1:
-                sym, num = op1.split('+')
-                lc = symtab[symtab_map[sym]][1] + int(num)
-            elif '-' in op1:
-                sym, num = op1.split('-') 
-                lc = symtab[symtab_map[sym]][1] - int(num)
-            else:
-                try:
-                    lc = int(op1)
-                except:
-                    lc = symtab[symtab_map[op1]][1]
-            ic = [lc, OPTAB[opcode]]
+    def origin(label, opcode, op1, op2):
+        nonlocal lc
+        if '+' in op1:
+            sym, num = op1.split('+')
+            lc = symtab[symtab_map[sym]][1] + int(num)
+        elif '-' in op1:
+            sym, num = op1.split('-') 
+            lc = symtab[symtab_map[sym]][1] - int(num)
+        elif is_int(op1):
+            lc = int(op1)
+        else:
+            lc = symtab[symtab_map[op1]][1]
+        emit(lc, AD, 3)
 
-        elif opcode == 'DC':
-            ic = [lc, OPTAB[opcode], ('C', op1.strip("'"))]
-            lc += 1
+    def linkage(label, opcode, op1, op2):
+        # Exported or external symbol, used by linker.py
+        if op1 not in symtab_map:
+            symtab_map[op1] = len(symtab)
+            symtab.append([op1, -1])
+        emit(lc, *OPCODES[opcode], SYM, symtab_map[op1])
 
-        elif opcode == 'DS':
-            ic = [lc, OPTAB[opcode], ('C', op1)]
-            lc += int(op1)
+    def dc(label, opcode, op1, op2):
+        nonlocal lc
+        emit(lc, DL, 1, CONST, constant(op1))
+        lc += 1
 
-        else: # IS statements
-            ic = [lc, OPTAB[opcode]]
-
-            def encode_operand(op):
-                if op == '':
-                    return ''
-                elif op in REGTAB:
-                    return REGTAB[op]
-                elif op in CONDTAB:
-                    return CONDTAB[op]
-                
-                elif op.startswith('='):
-                    if op not in littab_map:
-                        littab_map[op] = len(littab)
-                        littab.append([op, -1]) 
-                    
-                    if op not in unassigned_literals_in_pool:
-                        unassigned_literals_in_pool.append(op)
-                        
-                    return ('L', littab_map[op])
-                
-                elif op in symtab_map:
-                    return ('S', symtab_map[op])
-                try:
-                    return ('C', int(op))
-                except:
-                    # symbol with forward reference
-                    symtab_map[op] = len(symtab)
-                    symtab.append([op, -1])
-                    return ('S', symtab_map[op])
-
-            if op1: ic.append(encode_operand(op1))
-            if op2: ic.append(encode_operand(op2))
-            lc += 1
-        
-        intermediate_code.append(ic)
+    def ds(label, opcode, op1, op2):
+        nonlocal lc
+        emit(lc, DL, 2, CONST, int(op1))
+        lc += int(op1)
 
+    def imperative(label, opcode, op1, op2):
+        nonlocal lc
+        code = IS_CODES[opcode]
+        if op1 and op2:
+            emit(lc, IS, code, *encode_operand(op1), *encode_operand(op2))
+        elif op1 or op2:
+            emit(lc, IS, code, *encode_operand(op1 or op2))
+        else:
+            emit(lc, IS, code)
+        lc += 1
+
+    def label_only(label, opcode, op1, op2):
+        pass
+
+    handlers = dict.fromkeys(IS_CODES, imperative)
+    handlers.update({
+        'START': start, 'END': place_pool, 'LTORG': place_pool,
+        'ORIGIN': origin, 'EQU': equ, 'ENTRY': linkage, 'EXTRN': linkage,
+        'DC': dc, 'DS': ds, '': label_only,
+    })
+
+    for label, opcode, op1, op2 in assembly_code:
+        if label:
+            define(label)
+        if handlers[opcode](label, opcode, op1, op2):
+            break
+
+    if timer:
+        timer.finish(symbols=len(symtab), literals=len(littab), pools=len(pooltab) - 1,
+                     forward_refs=forward_refs, rows=len(intermediate_code))
     return symtab, littab, pooltab, intermediate_code
 
 
 # --- Pass 2 Function ---
-def pass2(intermediate_code, symbol_table, literal_table, pooltab):
+def pass2(intermediate_code, symbol_table, literal_table, pooltab, hook=None):
     """
-    Performs Pass 2 of the assembler.
+    Performs Pass 2 of the assembler. With `hook`, it is called with a
+    passhooks.PhaseReport at the end.
     Returns: machine_code (list of lists)
     """
+    timer = start_phase(hook, "ass", "pass2")
     machine_code = []
 
-    for ic_entry in intermediate_code:
-        if len(ic_entry) < 2:
-            continue
-            
-        LC = ic_entry[0]
-        opclass, opnum = ic_entry[1]
-
+    for LC, opclass, opnum, kind1, val1, kind2, val2 in intermediate_code:
         # AD (Assembler Directives) are processed in Pass 1
-        if opclass == 'AD':
+        if opclass == AD:
             continue
 
         # DS (Define Storage)
-        if opclass == 'DL' and opnum == '02':  # DS
-            try:
-                space = int(ic_entry[2][1]) 
-            except (IndexError, ValueError):
-                space = 0
-                
-            for i in range(space):
+        if opclass == DL and opnum == 2:
+            for i in range(val1):
                 mc_line = [str(LC + i), '00', '0', '000']
                 machine_code.append(mc_line)
             continue 
 
         # --- IS (Imperative) and DC (Declarative Constant) ---
-        mc_line = [str(LC)]
-        
-        if opclass == 'IS':
-            mc_line.append(opnum) # Add opcode
+        if opclass == IS:
+            mc_line = [str(LC), f"{opnum:02d}"]
             
-            for operand in ic_entry[2:]:
-                if isinstance(operand, int): # Register or Condition
-                    mc_line.append(str(operand))
-                elif isinstance(operand, tuple):
-                    typechar, val = operand
-                    if typechar == 'C':
-                        mc_line.append(str(val))
-                    elif typechar == 'S':  # Symbol
-                        addr = symbol_table[val][1]
-                        mc_line.append(str(addr))
-                    elif typechar == 'L':  # Literal
-                        addr = literal_table[val][1]
-                        mc_line.append(str(addr))
-                elif isinstance(operand, str) and operand.isdigit():
-                    mc_line.append(operand)
+            for kind, val in ((kind1, val1), (kind2, val2)):
+                if kind == SYM:
+                    mc_line.append(str(symbol_table[val][1]))
+                elif kind == LIT:
+                    mc_line.append(str(literal_table[val][1]))
+                elif kind != NONE: # Register, condition or constant
+                    mc_line.append(str(val))
             
             while len(mc_line) < 4:
                 mc_line.append('0')
 
-        elif opclass == 'DL' and opnum == '01':  # DC (or literal)
-            value = '0'
-            try:
-                if isinstance(ic_entry[2], tuple) and ic_entry[2][0] == 'C':
-                    value = str(ic_entry[2][1])
-            except IndexError:
-                pass
-            
-            mc_line = [str(LC), '00', '0', value.zfill(3)]
+        else: # DC (or literal)
+            mc_line = [str(LC), '00', '0', str(val1).zfill(3)]
         
         machine_code.append(mc_line)
         
+    if timer:
+        timer.lines = len(intermediate_code)
+        timer.finish(symbols=len(symbol_table), literals=len(literal_table),
+                     words=len(machine_code))
     return machine_code
 
 
+def pass2_array(intermediate_code, symbol_table, literal_table):
+    """
+    Vectorized Pass 2 (needs numpy). Operand columns are resolved with
+    one gather per table and DS regions are expanded with np.repeat, so
+    no Python code runs per instruction.
+    Returns: machine code as an (n, 4) int64 array of
+    [LC, opcode, field 1, field 2] rows, the numbers in pass2()'s rows.
+    """
+    if np is None:
+        raise RuntimeError("pass2_array() needs numpy; use pass2()")
+    ic = intermediate_code
+    lc = np.frombuffer(ic.lc, np.int64)
+    opclass = np.frombuffer(ic.cls, np.uint8)
+    opnum = np.frombuffer(ic.code, np.uint8).astype(np.int64)
+    val1 = np.frombuffer(ic.val1, np.int64)
+    symbol_addr = np.array([addr for _, addr in symbol_table], np.int64)
+    literal_addr = np.array([addr for _, addr in literal_table], np.int64)
+
+    def resolve(kinds, values):
+        kinds = np.frombuffer(kinds, np.uint8)
+        values = np.frombuffer(values, np.int64)
+        fields = values.copy()
+        is_sym = kinds == SYM
+        fields[is_sym] = symbol_addr[values[is_sym]]
+        is_lit = kinds == LIT
+        fields[is_lit] = literal_addr[values[is_lit]]
+        return fields
+
+    field1 = resolve(ic.kind1, ic.val1)
+    field2 = resolve(ic.kind2, ic.val2)
+
+    # AD rows produce nothing, a DS produces val1 rows and the rest one each
+    is_is = opclass == IS
+    is_ds = (opclass == DL) & (opnum == 2)
+    is_dc = (opclass == DL) & (opnum == 1)
+    counts = np.where(is_ds, np.maximum(val1, 0), 1)
+    counts[opclass == AD] = 0
+
+    rows = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    offsets = np.arange(len(rows)) - starts[rows]   # position within a DS
+
+    machine_code = np.zeros((len(rows), 4), np.int64)
+    machine_code[:, 0] = lc[rows] + offsets
+    machine_code[:, 1] = np.where(is_is, opnum, 0)[rows]
+    machine_code[:, 2] = np.where(is_is, field1, 0)[rows]
+    machine_code[:, 3] = np.where(is_is, field2, np.where(is_dc, val1, 0))[rows]
+    return machine_code
+
+
+def pass2_object(intermediate_code, symbol_table, literal_table, path, hook=None):
+    """
+    Pass 2 writing a binary object file (see objfile.py) to `path`
+    instead of returning machine code rows. Each word holds the same
+    fields as a pass2() row, and a DS becomes one reserved block rather
+    than one row per word. `hook` is as for pass2().
+    """
+    timer = start_phase(hook, "ass", "pass2_object")
+    start = 0
+    with open(path, 'wb') as f:
+        out = ObjectWriter(timer.file(f) if timer else f)
+        for LC, opclass, opnum, kind1, val1, kind2, val2 in intermediate_code:
+            if opclass == AD:
+                if opnum == 1: # START
+                    start = val1
+                continue
+
+            if opclass == DL and opnum == 2: # DS
+                out.reserve(LC, val1)
+                continue
+
+            if opclass == IS:
+                fields = []
+                for kind, val in ((kind1, val1), (kind2, val2)):
+                    if kind == SYM:
+                        fields.append(symbol_table[val][1])
+                    elif kind == LIT:
+                        fields.append(literal_table[val][1])
+                    elif kind != NONE:
+                        fields.append(val)
+                fields += [0] * (2 - len(fields))
+                out.word(LC, opnum, *fields)
+
+            else: # DC (or literal)
+                out.word(LC, 0, 0, val1)
+
+        out.finish(symbol_table, start)
+
+    if timer:
+        timer.lines = len(intermediate_code)
+        timer.finish(symbols=len(symbol_table), literals=len(literal_table),
+                     blocks=out.block_count)
+
+
+# --- One-Pass Assembly ---
+def assemble_one_pass(assembly_code, emit=None, dedup_literals=False):
+    """
+    Assembles in a single pass, emitting machine code rows directly
+    instead of building intermediate code for pass2.
+
+    An operand that refers to a symbol not yet defined, or to a literal
+    whose pool has not been placed, is emitted as a placeholder and
+    recorded in that symbol's or literal's fix-up chain. The chain is
+    patched when the label is defined or at LTORG/END.
+
+    With `emit` given, each row is passed to emit(row) as soon as it
+    and every row before it are final, so only the rows waiting on a
+    forward reference are held in memory. Otherwise the rows are
+    returned as a list.
+
+    The output matches pass2(pass1(...)) as long as no symbol is
+    defined twice. A symbol always gets the address of its first
+    definition. dedup_literals is as for LiteralPool.
+    Returns: symtab, littab, pooltab, machine_code (None with `emit`)
+    """
+    if isinstance(assembly_code, str):
+        assembly_code = tokenize(assembly_code)
+
+    symtab_map = {}
+    symtab = []
+    littab_map = {}
+    littab = []
+    pooltab = [0]
+    pool = LiteralPool(dedup_literals)
+
+    sym_fixups = {}   # symtab index -> [(row number, column), ...]
+    lit_fixups = {}   # littab index -> [(row number, column), ...]
+    window = deque()  # rows not yet emitted, starting at row number `first`
+    first = 0
+    pending = {}      # row number -> placeholders still unpatched
+    machine_code = [] if emit is None else None
+    emit = machine_code.append if emit is None else emit
+    lc = 0
+
+    def add_row(row):
+        window.append(row)
+        flush()
+
+    def flush():
+        nonlocal first
+        while window and not pending.get(first):
+            emit(window.popleft())
+            pending.pop(first, None)
+            first += 1
+
+    def patch(fixups, addr):
+        for row, col in fixups:
+            window[row - first][col] = str(addr)
+            pending[row] -= 1
+        flush()
+
+    def define(label, addr):
+        if label not in symtab_map:
+            symtab_map[label] = len(symtab)
+            symtab.append([label, addr])
+        elif symtab[symtab_map[label]][1] == -1:
+            symtab[symtab_map[label]][1] = addr
+            patch(sym_fixups.pop(symtab_map[label], ()), addr)
+        else:
+            print(f"Error: Duplicate symbol '{label}'")
+
+    def encode_operand(op, row, col):
+        if op in REGTAB:
+            return str(REGTAB[op])
+        elif op in CONDTAB:
+            return str(CONDTAB[op])
+        elif op.startswith('='):
+            if op not in littab_map:
+                littab_map[op] = len(littab)
+                littab.append([op, -1])
+            index = littab_map[op]
+            pool.add(op, index)
+            if littab[index][1] != -1:
+                return str(littab[index][1])
+            lit_fixups.setdefault(index, []).append((row, col))
+        elif op in symtab_map:
+            index = symtab_map[op]
+            if symtab[index][1] != -1:
+                return str(symtab[index][1])
+            sym_fixups.setdefault(index, []).append((row, col))
+        elif is_int(op):
+            return str(int(op))
+        else:
+            # symbol with forward reference
+            symtab_map[op] = len(symtab)
+            symtab.append([op, -1])
+            sym_fixups[symtab_map[op]] = [(row, col)]
+        pending[row] = pending.get(row, 0) + 1
+        return '-1'
+
+    for line in assembly_code:
+        label, opcode, op1, op2 = line
+
+        if opcode == 'EQU':
+            define(label, symtab[symtab_map[op1]][1])
+            continue
+        if label:
+            define(label, lc)
+
+        if not opcode: # label only
+            continue
+
+        elif opcode == 'START':
+            if op1:
+                lc = int(op1)
+
+        elif opcode in ('LTORG', 'END'):
+            if pool:
+                placed, values = pool.place(littab, lc)
+                for value in values:
+                    add_row([str(lc), '00', '0', str(value).zfill(3)])
+                    lc += 1
+                for lit_index in placed:
+                    patch(lit_fixups.pop(lit_index, ()), littab[lit_index][1])
+                pooltab.append(len(littab))
+            if opcode == 'END':
+                break
+
+        elif opcode == 'ORIGIN':
+            if '+' in op1:
+                sym, num = op1.split('+')
+                lc = symtab[symtab_map[sym]][1] + int(num)
+            elif '-' in op1:
+                sym, num = op1.split('-')
+                lc = symtab[symtab_map[sym]][1] - int(num)
+            elif is_int(op1):
+                lc = int(op1)
+            else:
+                lc = symtab[symtab_map[op1]][1]
+
+        elif opcode in ('ENTRY', 'EXTRN'):
+            if op1 not in symtab_map:
+                symtab_map[op1] = len(symtab)
+                symtab.append([op1, -1])
+
+        elif opcode == 'DC':
+            add_row([str(lc), '00', '0', str(constant(op1)).zfill(3)])
+            lc += 1
+
+        elif opcode == 'DS':
+            for i in range(int(op1)):
+                add_row([str(lc + i), '00', '0', '000'])
+            lc += int(op1)
+
+        else: # IS statements
+            row_number = first + len(window)
+            row = [str(lc), OPTAB[opcode][1]]
+            if op1: row.append(encode_operand(op1, row_number, len(row)))
+            if op2: row.append(encode_operand(op2, row_number, len(row)))
+            while len(row) < 4:
+                row.append('0')
+            add_row(row)
+            lc += 1
+
+    # Whatever is still unresolved keeps the -1 placeholder, as in pass2
+    pending.clear()
+    flush()
+    return symtab, littab, pooltab, machine_code
+
+
 # --- Main Execution Block ---
 if __name__ == "__main__":
     
@@ -244,8 +622,8 @@ if __name__ == "__main__":
     print("\n--- POOL TABLE ---")
     print(pooltab)
     print("\n--- INTERMEDIATE CODE ---")
-    for entry in ic:
-        print(entry)
+    for i in range(len(ic)):
+        print(ic.format(i))
 
     # --- Run Pass 2 ---
     print("\nRunning Pass 2...")
@@ -258,3 +636,22 @@ if __name__ == "__main__":
     for line in mc:
         # ljust(4) adds padding to align the columns
         print(" ".join(str(x).ljust(4) for x in line))
+
+    # --- Object File ---
+    print("Writing output.obj...")
+    pass2_object(ic, symtab, littab, "output.obj")
+    with ObjectFile("output.obj") as obj:
+        print("Symbols:", obj.symbols)
+        words = [[str(lc), f"{op:02d}", str(f1), str(f2)] for lc, op, f1, f2 in obj.words()]
+        print("Matches Pass 2:", words == [line[:3] + [str(int(line[3]))] for line in mc])
+
+    # --- Vectorized Pass 2 ---
+    if np is not None:
+        print("Running Vectorized Pass 2...")
+        words = pass2_array(ic, symtab, littab)
+        print("Matches Pass 2:", words.tolist() == [[int(x) for x in line] for line in mc])
+
+    # --- One-Pass Assembly ---
+    print("Running One-Pass Assembly...")
+    _, _, _, mc_one_pass = assemble_one_pass(assembly_code2)
+    print("Matches Pass 1 + Pass 2:", mc_one_pass == mc)
@@ -0,0 +1,332 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import ass
+import macro
+from Assembler1 import Assembler
+from benchenv import environment
+from passhooks import PhaseLog
+
+TOOLS = ("ass", "assembler1", "macro")
+IS_OPS = ("ADD", "SUB", "MULT", "MOVER", "MOVEM", "COMP", "DIV")
+REGISTERS = ("AREG", "BREG", "CREG", "DREG")
+
+
+def parse_ints(text):
+    return [int(x) for x in text.split(",")]
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"Expected a whole number of at least 1, got {value}")
+    return value
+
+
+def parse_tools(text):
+    tools = text.split(",")
+    for tool in tools:
+        if tool not in TOOLS:
+            raise argparse.ArgumentTypeError(f"Unknown tool '{tool}'")
+    return tools
+
+
+# --- Workload Generator ---
+
+def plan_labels(rng, lines, density):
+    """Returns the line numbers that get a label, in order."""
+    return [i for i in range(lines) if rng.random() < density]
+
+
+def pick_symbol(rng, labelled, i, forward_ratio):
+    """
+    Picks the label of some line: one after line i with probability
+    forward_ratio (a forward reference), otherwise one at or before it.
+    Returns None when there are no labels at all.
+    """
+    if not labelled:
+        return None
+    # labelled is sorted; split it at line i
+    lo, hi = 0, len(labelled)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if labelled[mid] <= i:
+            lo = mid + 1
+        else:
+            hi = mid
+    forward = rng.random() < forward_ratio
+    if forward and lo < len(labelled) or not lo:
+        return f"L{labelled[rng.randrange(lo, len(labelled))]}"
+    return f"L{labelled[rng.randrange(lo)]}"
+
+
+def generate_ass(rng, args, lines):
+    """
+    Generates ass.py source text of `lines` statements. Without labels,
+    every memory operand is a literal.
+    """
+    labelled = plan_labels(rng, lines, args.symbol_density)
+    is_label = set(labelled)
+    out = ["        START 100"]
+    for i in range(lines):
+        label = f"L{i}" if i in is_label else ""
+        r = rng.random()
+        if r < args.ds_ratio:
+            out.append(f"{label:8}DS {rng.randint(1, args.ds_size)}")
+        elif r < args.ds_ratio + args.dc_ratio:
+            out.append(f"{label:8}DC '{rng.randint(0, 999)}'")
+        elif r < args.ds_ratio + args.dc_ratio + 0.05 and labelled:
+            cond = rng.choice(("LT", "LE", "EQ", "GT", "GE", "ANY"))
+            out.append(f"{label:8}BC {cond}, {pick_symbol(rng, labelled, i, args.forward_ratio)}")
+        else:
+            operand = None
+            if rng.random() >= args.literal_ratio:
+                operand = pick_symbol(rng, labelled, i, args.forward_ratio)
+            if operand is None:
+                operand = f"='{rng.randrange(args.literal_values)}'"
+            out.append(f"{label:8}{rng.choice(IS_OPS)} {rng.choice(REGISTERS)}, {operand}")
+        if args.ltorg_every and i % args.ltorg_every == args.ltorg_every - 1:
+            out.append("        LTORG")
+    out.append("        END")
+    return "\n".join(out) + "\n"
+
+
+def generate_assembler1(rng, args, lines):
+    """
+    Generates Assembler1.py source text; it has no literals or LTORG, and
+    its DC and DS need a label. Without labels, every operand refers to
+    one constant, ZERO, defined at the end.
+    """
+    labelled = plan_labels(rng, lines, args.symbol_density)
+    is_label = set(labelled)
+    out = ["START 100"]
+    for i in range(lines):
+        label = f"L{i}: " if i in is_label else ""
+        # scaled so DS and DC still make up ds_ratio and dc_ratio of all lines
+        r = rng.random() * args.symbol_density if label else 1.0
+        if r < args.ds_ratio:
+            out.append(f"{label}DS {rng.randint(1, args.ds_size)}")
+        elif r < args.ds_ratio + args.dc_ratio:
+            out.append(f"{label}DC {rng.randint(0, 999)}")
+        else:
+            symbol = pick_symbol(rng, labelled, i, args.forward_ratio) or "ZERO"
+            op = rng.choice(("MOVER", "ADD", "STORE", "SUB", "JMP"))
+            if op == "JMP":
+                out.append(f"{label}JMP {symbol}")
+            else:
+                out.append(f"{label}{op} {rng.choice('ABCD')}, {symbol}")
+    if not labelled:
+        out.append("ZERO: DC 0")
+    out.append("END")
+    return "\n".join(out) + "\n"
+
+
+def generate_macro(rng, args, lines):
+    """
+    Generates macro.py source text: args.macros definitions, then `lines`
+    statements of which args.call_ratio are macro calls. With
+    args.macro_depth > 1, macro bodies call earlier macros, chains up to
+    that deep (macro.py itself expands one level).
+    """
+    out = []
+    for m in range(args.macros):
+        out += ["MACRO", f"M{m} &A, &B, &R=AREG", "MOVER &R, &A", "ADD &R, &B"]
+        if m % args.macro_depth:
+            out.append(f"M{m - 1} &A, &B, &R")
+        out += ["MOVEM &R, &A", "MEND"]
+    out.append("START")
+    for i in range(lines):
+        if args.macros and rng.random() < args.call_ratio:
+            call = f"M{rng.randrange(args.macros)} D{rng.randrange(16)}, {rng.randint(0, 99)}"
+            if rng.random() < 0.3:
+                call += f", &R={rng.choice(REGISTERS)}"
+            out.append(call)
+        else:
+            out.append(f"{rng.choice(IS_OPS)} {rng.choice(REGISTERS)}, D{rng.randrange(16)}")
+    out.append("STOP")
+    out += [f"D{d} DS 1" for d in range(16)]
+    out.append("END")
+    return "\n".join(out) + "\n"
+
+
+# --- Phases ---
+
+def ass_phases(source, hook=None):
+    """
+    (name, function) for each phase of ass.py; later phases use earlier
+    results. `hook` is passed on to the passes that take one.
+    """
+    state = {}
+
+    def tokenize():
+        state["lines"] = list(ass.tokenize(source))
+
+    def pass1():
+        state["pass1"] = ass.pass1(state["lines"], hook)
+
+    def pass2():
+        symtab, littab, pooltab, ic = state["pass1"]
+        ass.pass2(ic, symtab, littab, pooltab, hook)
+
+    def pass2_array():
+        symtab, littab, pooltab, ic = state["pass1"]
+        ass.pass2_array(ic, symtab, littab)
+
+    def pass2_object():
+        symtab, littab, pooltab, ic = state["pass1"]
+        ass.pass2_object(ic, symtab, littab, os.devnull, hook)
+
+    def one_pass():
+        ass.assemble_one_pass(state["lines"])
+
+    phases = [("tokenize", tokenize), ("pass1", pass1), ("pass2", pass2)]
+    if ass.np is not None:
+        phases.append(("pass2_array", pass2_array))
+    phases += [("pass2_object", pass2_object), ("one_pass", one_pass)]
+    return phases
+
+
+def assembler1_phases(source, hook=None):
+    assembler = Assembler(hook)
+
+    def pass1():
+        assembler.pass1(source)
+
+    def pass2():
+        assembler.pass2()
+
+    return [("pass1", pass1), ("pass2", pass2)]
+
+
+def macro_phases(source, hook=None):
+    # macro.py works on fixed file names in the current directory
+    state = {}
+
+    def pass1():
+        with open("macro_input.asm", "w") as f:
+            f.write(source)
+        state["tables"] = macro.pass1(hook)
+
+    def pass2():
+        macro.pass2(*state["tables"], hook)
+
+    return [("pass1", pass1), ("pass2", pass2)]
+
+
+GENERATORS = {"ass": generate_ass, "assembler1": generate_assembler1, "macro": generate_macro}
+PHASES = {"ass": ass_phases, "assembler1": assembler1_phases, "macro": macro_phases}
+
+
+def measure(phases, repeat):
+    """
+    Runs the phases in order `repeat` times and keeps each one's best wall
+    and CPU time, then once more under tracemalloc for its peak memory
+    (kept out of the timed runs, which it would slow down).
+    """
+    best = {name: [float("inf"), float("inf")] for name, _ in phases}
+    for _ in range(repeat):
+        for name, phase in phases:
+            wall, cpu = time.perf_counter(), time.process_time()
+            phase()
+            best[name][0] = min(best[name][0], time.perf_counter() - wall)
+            best[name][1] = min(best[name][1], time.process_time() - cpu)
+
+    peaks = {}
+    for name, phase in phases:
+        tracemalloc.start()
+        phase()
+        peaks[name] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {name: {"wall_s": round(best[name][0], 6), "cpu_s": round(best[name][1], 6),
+                   "peak_bytes": peaks[name]} for name, _ in phases}
+
+
+def run_case(tool, lines, args):
+    rng = random.Random(args.seed)
+    source = GENERATORS[tool](rng, args, lines)
+    log = PhaseLog()
+    with contextlib.redirect_stdout(io.StringIO()):   # the passes print errors and progress
+        phases = measure(PHASES[tool](source), args.repeat)
+        if args.profile:
+            # One more run through the passes' hooks, for their counters and I/O split
+            for name, phase in PHASES[tool](source, log):
+                phase()
+    for figures in phases.values():
+        figures["lines_per_s"] = round(lines / figures["wall_s"], 1) if figures["wall_s"] else 0.0
+    result = {"tool": tool, "lines": lines, "source_bytes": len(source), "phases": phases}
+    if args.profile:
+        result["reports"] = [report.as_dict() for report in log.reports]
+    return result
+
+
+# --- Main Execution Block ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time each pass of ass.py, Assembler1.py and macro.py on generated programs")
+    parser.add_argument("--tools", type=parse_tools, default=list(TOOLS))
+    parser.add_argument("--sizes", type=parse_ints, default=parse_ints("1000,10000,100000"),
+                        help="statements per generated program")
+    parser.add_argument("--symbol-density", type=float, default=0.2,
+                        help="fraction of statements with a label")
+    parser.add_argument("--forward-ratio", type=float, default=0.3,
+                        help="fraction of symbol references to labels defined later")
+    parser.add_argument("--literal-ratio", type=float, default=0.1,
+                        help="fraction of operands that are literals (ass only)")
+    parser.add_argument("--literal-values", type=int, default=100,
+                        help="distinct literal values (ass only)")
+    parser.add_argument("--ltorg-every", type=int, default=500,
+                        help="statements between LTORGs, 0 for none (ass only)")
+    parser.add_argument("--ds-ratio", type=float, default=0.05, help="fraction of DS statements")
+    parser.add_argument("--ds-size", type=int, default=10, help="largest DS size")
+    parser.add_argument("--dc-ratio", type=float, default=0.05, help="fraction of DC statements")
+    parser.add_argument("--macros", type=int, default=20, help="macro definitions (macro only)")
+    parser.add_argument("--macro-depth", type=positive_int, default=1,
+                        help="longest chain of macros calling macros (macro only)")
+    parser.add_argument("--call-ratio", type=float, default=0.3,
+                        help="fraction of statements that are macro calls (macro only)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case; the best is kept")
+    parser.add_argument("--profile", action="store_true",
+                        help="also report each pass's counters and I/O time (see passhooks.py)")
+    parser.add_argument("--json", metavar="FILE",
+                        help="write machine-readable results to FILE ('-' for stdout)")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            for tool in args.tools:
+                for lines in args.sizes:
+                    r = run_case(tool, lines, args)
+                    results.append(r)
+                    if args.json != "-":
+                        for phase, figures in r["phases"].items():
+                            print(f"{tool:>10} {lines:>8} {phase:>12} {figures['wall_s'] * 1000:>10.2f} ms "
+                                  f"{figures['lines_per_s']:>12.0f} lines/s "
+                                  f"{figures['peak_bytes'] / (1 << 20):>8.2f} MiB")
+                        for report in r.get("reports", ()):
+                            print(f"{'':>20} {report['tool']}.{report['phase']}: "
+                                  + " ".join(f"{k}={v}" for k, v in report["counters"].items())
+                                  + f" io={report['io_s'] * 1000:.2f} ms")
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "json"},
+        "environment": environment(),
+        "results": results,
+    }
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
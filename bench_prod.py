@@ -0,0 +1,110 @@
+import argparse
+import itertools
+import json
+import threading
+import time
+
+from prod import BoundedBuffer, BufferClosed
+
+
+def parse_ints(text):
+    return [int(x) for x in text.split(",")]
+
+
+def parse_pairs(text):
+    """Parses "1x1,2x2,4x1" into [(producers, consumers), ...]."""
+    return [tuple(int(n) for n in pair.split("x")) for pair in text.split(",")]
+
+
+def work(cost_us, kind):
+    """Simulates per-item consumer work of cost_us microseconds."""
+    if not cost_us:
+        return
+    if kind == "io":
+        time.sleep(cost_us / 1e6)
+        return
+    end = time.perf_counter_ns() + cost_us * 1000
+    while time.perf_counter_ns() < end:
+        pass
+
+
+def run_case(size, producers, consumers, cost_us, items, batch, kind):
+    """Runs one configuration and returns the buffer's stats snapshot."""
+    buffer = BoundedBuffer(size, instrument=True)
+    per_producer = items // producers
+
+    def produce():
+        if batch > 1:
+            chunk = list(range(batch))
+            for _ in range(per_producer // batch):
+                buffer.put_many(chunk)
+        else:
+            for item in range(per_producer):
+                buffer.put(item)
+
+    def consume():
+        if batch > 1:
+            while True:
+                try:
+                    got = buffer.get_many(batch)
+                except BufferClosed:
+                    return
+                for _ in got:
+                    work(cost_us, kind)
+        else:
+            for _ in buffer:
+                work(cost_us, kind)
+
+    producer_threads = [threading.Thread(target=produce) for _ in range(producers)]
+    consumer_threads = [threading.Thread(target=consume) for _ in range(consumers)]
+    for t in producer_threads + consumer_threads:
+        t.start()
+    for t in producer_threads:
+        t.join()
+    buffer.close()
+    for t in consumer_threads:
+        t.join()
+
+    result = buffer.snapshot()
+    result.update(size=size, producers=producers, consumers=consumers,
+                  cost_us=cost_us, batch=batch, work=kind)
+    return result
+
+
+# --- Main Execution Block ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Sweep BoundedBuffer size, thread counts and item cost")
+    parser.add_argument("--sizes", type=parse_ints, default=parse_ints("1,5,16,64,256"))
+    parser.add_argument("--threads", type=parse_pairs, default=parse_pairs("1x1,2x2,4x4"),
+                        help="producer x consumer counts, e.g. 1x1,4x2")
+    parser.add_argument("--costs", type=parse_ints, default=parse_ints("0,20"),
+                        help="consumer work per item, microseconds")
+    parser.add_argument("--work", choices=("cpu", "io"), default="cpu",
+                        help="spin (holds the GIL) or sleep (releases it)")
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=1,
+                        help="items per put_many/get_many call; 1 uses put/get")
+    parser.add_argument("--json", metavar="FILE",
+                        help="write all results to FILE ('-' for stdout)")
+    args = parser.parse_args()
+
+    results = []
+    if args.json != "-":
+        print(f"{'size':>5} {'P':>2} {'C':>2} {'cost':>5} {'items/s':>10} "
+              f"{'fill':>5} {'put blk':>8} {'put p99':>9} {'get blk':>8} {'get p99':>9}")
+    for size, (producers, consumers), cost in itertools.product(
+            args.sizes, args.threads, args.costs):
+        r = run_case(size, producers, consumers, cost, args.items, args.batch, args.work)
+        results.append(r)
+        if args.json != "-":
+            print(f"{size:>5} {producers:>2} {consumers:>2} {cost:>5} {r['items_per_s']:>10.0f} "
+                  f"{r['mean_fill']:>5.2f} {r['blocked_puts']:>8} "
+                  f"{r['put_wait_ns']['p99'] / 1000:>7.0f}us {r['blocked_gets']:>8} "
+                  f"{r['get_wait_ns']['p99'] / 1000:>7.0f}us")
+
+    if args.json == "-":
+        print(json.dumps(results, indent=2))
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
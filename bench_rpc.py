@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from RPCC import RPCClient
+from benchenv import environment
+from histogram import LatencyHistogram
+from protocol import OP_ADD, OP_SUB
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Request kind -> (text choice, batch op)
+KINDS = {
+    "add": ("1", OP_ADD),
+    "sub": ("2", OP_SUB),
+    "invalid": ("9", 9),
+}
+
+
+def parse_mix(text):
+    """Parses "add=45,sub=45,invalid=10" into a list of (kind, weight)."""
+    mix = []
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in KINDS:
+            raise argparse.ArgumentTypeError(f"Unknown request kind '{kind}'")
+        mix.append((kind, float(weight or 1)))
+    return mix
+
+
+# --- Server Process ---
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, timeout=10.0):
+    """Starts RPCS.py on `port` and waits until it accepts connections."""
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "RPCS.py"), "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("RPCS.py exited during startup")
+        try:
+            socket.create_connection(("localhost", port), 0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("RPCS.py did not start listening in time")
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+# --- Workers ---
+
+class LineConnection:
+    """Minimal line-mode client: one request, one reply line."""
+
+    def __init__(self, port):
+        self.sock = socket.create_connection(("localhost", port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.sock.makefile("rb")
+
+    def call(self, choice, a, b):
+        self.sock.sendall(f"{choice} {a} {b}\n".encode())
+        return self.file.readline()
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def open_connection(args):
+    if args.protocol == "line":
+        return LineConnection(args.port)
+    return RPCClient(port=args.port, binary=args.protocol == "binary")
+
+
+def run_worker(args, count, seed, hist, errors):
+    """Issues `count` requests and records each latency in `hist` (ns)."""
+    rng = random.Random(seed)
+    kinds = [kind for kind, _ in args.mix]
+    weights = [weight for _, weight in args.mix]
+    operands = list(range(args.payload))
+    conn = open_connection(args) if args.reuse else None
+    window = []  # (start time, future) for pipelined requests
+
+    def finish(start, future):
+        try:
+            future.result()
+        except OSError:
+            errors.append(1)
+        hist.record(time.perf_counter_ns() - start)
+
+    try:
+        for _ in range(count):
+            choice, op = KINDS[rng.choices(kinds, weights)[0]]
+            if conn is None:
+                conn = open_connection(args)
+            start = time.perf_counter_ns()
+            if args.protocol == "line":
+                conn.call(choice, 7, 5)
+                hist.record(time.perf_counter_ns() - start)
+            else:
+                if args.payload > 1:
+                    future = conn.submit_batch(op, operands, operands)
+                else:
+                    future = conn.submit(choice, 7, 5)
+                window.append((start, future))
+                if len(window) >= args.pipeline:
+                    finish(*window.pop(0))
+            if not args.reuse:
+                while window:
+                    finish(*window.pop(0))
+                conn.close()
+                conn = None
+        while window:
+            finish(*window.pop(0))
+    except OSError:
+        errors.append(1)
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+def run_benchmark(args):
+    """Runs the configured load against the server and returns the result dict."""
+    per_worker = [args.requests // args.concurrency] * args.concurrency
+    for i in range(args.requests % args.concurrency):
+        per_worker[i] += 1
+    hists = [LatencyHistogram() for _ in per_worker]
+    errors = []
+
+    # Warm up imports, sockets and the server's caches
+    warm = argparse.Namespace(**vars(args))
+    warm.mix = [("add", 1)]
+    run_worker(warm, min(200, args.requests), 0, LatencyHistogram(), [])
+
+    threads = [threading.Thread(target=run_worker, args=(args, n, i, hist, errors))
+               for i, (n, hist) in enumerate(zip(per_worker, hists))]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    total = LatencyHistogram()
+    for hist in hists:
+        total.merge(hist)
+    return {
+        "config": {
+            "protocol": args.protocol,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "mix": dict(args.mix),
+            "payload": args.payload,
+            "pipeline": args.pipeline,
+            "reuse": args.reuse,
+        },
+        "environment": environment(),
+        "elapsed_s": round(elapsed, 4),
+        "requests_per_s": round(total.count / elapsed, 1) if elapsed else 0.0,
+        "elements_per_s": round(total.count * args.payload / elapsed, 1) if elapsed else 0.0,
+        "errors": len(errors),
+        "latency_us": {
+            "p50": total.percentile(50) / 1000,
+            "p99": total.percentile(99) / 1000,
+            "p999": total.percentile(99.9) / 1000,
+            "max": total.max / 1000,
+            "mean": round(total.mean / 1000, 3),
+        },
+    }
+
+
+# --- Main Execution Block ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load generator for RPCS.py; starts a local server unless --port is given")
+    parser.add_argument("--protocol", choices=("line", "framed", "binary"), default="framed")
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads")
+    parser.add_argument("--requests", type=int, default=20000, help="total requests")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("add=50,sub=50"),
+                        help="request mix, e.g. add=45,sub=45,invalid=10")
+    parser.add_argument("--payload", type=int, default=1,
+                        help="elements per request; >1 sends batch requests")
+    parser.add_argument("--pipeline", type=int, default=1,
+                        help="outstanding requests per connection (framed/binary)")
+    parser.add_argument("--no-reuse", dest="reuse", action="store_false",
+                        help="open a new connection for every request")
+    parser.add_argument("--port", type=int, default=None,
+                        help="use an already running server on this port")
+    parser.add_argument("--json", metavar="FILE",
+                        help="write machine-readable results to FILE ('-' for stdout)")
+    args = parser.parse_args()
+    if args.payload > 1 and args.protocol == "line":
+        parser.error("batch payloads need --protocol framed or binary")
+
+    proc = None
+    if args.port is None:
+        args.port = free_port()
+        proc = start_server(args.port)
+    try:
+        result = run_benchmark(args)
+    finally:
+        if proc is not None:
+            stop_server(proc)
+
+    if args.json == "-":
+        print(json.dumps(result, indent=2))
+    else:
+        lat = result["latency_us"]
+        print(f"{args.protocol}: {result['requests_per_s']:.0f} req/s, "
+              f"p50 {lat['p50']:.1f}us  p99 {lat['p99']:.1f}us  p999 {lat['p999']:.1f}us  "
+              f"errors {result['errors']}")
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(result, f, indent=2)
@@ -0,0 +1,25 @@
+import os
+import platform
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# --- Environment Report for Benchmark Results ---
+
+def git_commit():
+    """The checked-out commit of this repository, or None outside git."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def environment():
+    """Where a benchmark ran, for its JSON report."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "commit": git_commit(),
+    }
@@ -0,0 +1,90 @@
+# --- HDR-style Latency Histogram ---
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of non-negative integer samples (e.g. latencies
+    in nanoseconds), in the style of HdrHistogram. Each power of two is
+    split into 2**SUB_BITS linear buckets, so recorded values keep about
+    3% relative precision at any magnitude while recording stays a few
+    integer operations.
+    """
+    SUB_BITS = 5
+    SUB_COUNT = 1 << SUB_BITS
+
+    def __init__(self):
+        self.counts = [0] * ((64 - self.SUB_BITS + 1) << self.SUB_BITS)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    @classmethod
+    def _index(cls, value):
+        if value < cls.SUB_COUNT:
+            return value
+        shift = value.bit_length() - cls.SUB_BITS - 1
+        return ((shift + 1) << cls.SUB_BITS) + (value >> shift) - cls.SUB_COUNT
+
+    @classmethod
+    def _bucket_range(cls, index):
+        """Returns (lowest, highest) value that falls in bucket `index`."""
+        if index < 2 * cls.SUB_COUNT:
+            return index, index
+        shift = (index >> cls.SUB_BITS) - 1
+        low = ((index & (cls.SUB_COUNT - 1)) + cls.SUB_COUNT) << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, value):
+        """Adds one sample; negative values count as 0."""
+        if value < 0:
+            value = 0
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        """Value at percentile p (0-100), to bucket precision; 0 if empty."""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * p // 100))  # ceil(count * p / 100)
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                low, high = self._bucket_range(index)
+                return min((low + high) // 2, self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def merge(self, other):
+        """Adds all samples of another histogram into this one."""
+        for index, n in enumerate(other.counts):
+            if n:
+                self.counts[index] += n
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+
+    def reset(self):
+        self.__init__()
+
+    def summary(self, percentiles=(50, 90, 99, 99.9)):
+        """Returns count, min, mean, max and the given percentiles as a dict."""
+        result = {
+            "count": self.count,
+            "min": self.min or 0,
+            "mean": round(self.mean, 1),
+            "max": self.max,
+        }
+        for p in percentiles:
+            result[f"p{p:g}"] = self.percentile(p)
+        return result
@@ -0,0 +1,486 @@
+import argparse
+import hashlib
+import os
+import pickle
+import time
+from array import array
+from itertools import chain
+
+from ass import CONDTAB, OPCODES, REGTAB, LiteralPool, constant, is_int, pass2_object
+from ir import AD, CONST, DL, IS, LIT, REG, SYM, IntermediateCode
+from linker import read_module
+
+BLOCK_LINES = 256                 # split long runs at the next label after this many lines
+DEFAULT_CACHE_BYTES = 64 << 20
+CACHE_VERSION = b"3"              # bump when Block or parse_block() changes
+
+# Lines whose effect depends on the addresses around them are not cached;
+# they split the source into blocks and are redone on every run.
+DIRECTIVES = ('START', 'END', 'ORIGIN', 'EQU', 'LTORG')
+
+
+# --- Blocks ---
+class Block:
+    """
+    Pass 1 result for a run of lines that does not depend on anything
+    outside it. Rows are IR rows with LC relative to the block's start;
+    their SYM and LIT operands index `names` and `literals`, which list the
+    block's symbols and literals in order of first appearance. labels are
+    (name index, relative LC) for each label defined in the block, and
+    errors the messages its lines gave, printed each time it is laid out.
+    """
+    __slots__ = ("size", "names", "literals", "labels", "errors", "rows")
+
+    def __init__(self):
+        self.size = 0
+        self.names = []
+        self.literals = []
+        self.labels = []
+        self.errors = []
+        self.rows = IntermediateCode()
+
+    # BlockCache pickles blocks as plain values, so its files name no
+    # class of this module (which is `__main__` when run as a script).
+    def state(self):
+        columns = tuple(getattr(self.rows, name) for name in IntermediateCode.__slots__)
+        return self.size, self.names, self.literals, self.labels, self.errors, columns
+
+    @classmethod
+    def from_state(cls, state):
+        block = cls()
+        block.size, block.names, block.literals, block.labels, block.errors, columns = state
+        for name, column in zip(IntermediateCode.__slots__, columns):
+            setattr(block.rows, name, column)
+        return block
+
+
+def parse_block(lines):
+    """Runs the position-independent part of Pass 1 over `lines`."""
+    block = Block()
+    names = {}
+    literals = {}
+    rel = 0
+
+    def encode_operand(op):
+        if op in REGTAB:
+            return REG, REGTAB[op]
+        elif op in CONDTAB:
+            return REG, CONDTAB[op]
+        elif op.startswith('='):
+            return LIT, literals.setdefault(op, len(literals))
+        elif op in names:
+            return SYM, names[op]
+        elif is_int(op):
+            return CONST, int(op)
+        return SYM, names.setdefault(op, len(names))
+
+    for label, opcode, op1, op2 in lines:
+        if label:
+            block.labels.append((names.setdefault(label, len(names)), rel))
+
+        if not opcode: # label only
+            continue
+        elif opcode == 'DC':
+            block.rows.append(rel, DL, 1, CONST, constant(op1, block.errors.append))
+            rel += 1
+        elif opcode == 'DS':
+            block.rows.append(rel, DL, 2, CONST, int(op1))
+            rel += int(op1)
+        elif opcode in ('ENTRY', 'EXTRN'):
+            block.rows.append(rel, *OPCODES[opcode], SYM, names.setdefault(op1, len(names)))
+        else: # IS statements
+            row = [rel, IS, OPCODES[opcode][1]]
+            if op1: row.extend(encode_operand(op1))
+            if op2: row.extend(encode_operand(op2))
+            block.rows.append(*row)
+            rel += 1
+
+    block.size = rel
+    block.names = list(names)
+    block.literals = list(literals)
+    return block
+
+
+def split_blocks(assembly_code, block_lines=BLOCK_LINES):
+    """
+    Yields (None, line) for each directive line and (key, lines) for each
+    block in between, where key is the block's content hash.
+    """
+    run = []
+    for line in assembly_code:
+        if line[1] in DIRECTIVES:
+            if run:
+                yield block_key(run), run
+                run = []
+            yield None, line
+            if line[1] == 'END':
+                return
+        else:
+            if line[0] and len(run) >= block_lines:
+                yield block_key(run), run
+                run = []
+            run.append(line)
+    if run:
+        yield block_key(run), run
+
+
+def block_key(lines):
+    text = "\x1f".join(chain.from_iterable(lines))
+    return hashlib.blake2b(CACHE_VERSION + text.encode(), digest_size=16).hexdigest()
+
+
+# --- On-disk Cache ---
+class BlockCache:
+    """
+    Parsed blocks pickled one file per content hash in `directory`. Reads
+    refresh a file's mtime, and once the files exceed max_bytes the least
+    recently used are deleted until they are back under 80% of it.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = sum(entry.stat().st_size for entry in os.scandir(directory)
+                        if entry.name.endswith(".blk"))
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".blk")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                block = Block.from_state(pickle.load(f))
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, TypeError, ValueError):
+            return None   # truncated or stale entry, parse again
+        os.utime(path)
+        return block
+
+    def put(self, key, block):
+        data = pickle.dumps(block.state(), pickle.HIGHEST_PROTOCOL)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        try:
+            replaced = os.stat(path).st_size
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp, path)
+        self.size += len(data) - replaced
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        entries = sorted((entry for entry in os.scandir(self.directory)
+                          if entry.name.endswith(".blk")),
+                         key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes * 0.8:
+                break
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            total -= entry.stat().st_size
+        self.size = total
+
+
+# --- Layout ---
+class Layout:
+    """
+    The tables IncrementalAssembler.pass1() builds, one item (a block or a
+    directive line) at a time, and what it takes to roll them back to
+    the start of any item: the table sizes before each item and a log of
+    what it changed in place. The next run keeps everything before the
+    first item that differs, so an edit costs the layout of what follows
+    it rather than of the whole program.
+
+    Symbol addresses are kept in an array beside the names, so the layout
+    holds no list per symbol; tables() builds ass.pass1()'s SYMTAB.
+    """
+
+    def __init__(self, dedup_literals):
+        self.dedup_literals = dedup_literals
+        self.symtab_map = {}
+        self.symbols = []              # symbol names, by SYMTAB index
+        self.addresses = array("q")    # their addresses, -1 until defined
+        self.littab_map = {}
+        self.littab = []
+        self.pooltab = [0]
+        self.pool = LiteralPool(dedup_literals)
+        self.ic = IntermediateCode()
+        self.lc = 0         # after the last item
+        self.items = []     # block key, or the line of a directive, per item
+        self.marks = []     # table sizes, pool size and LC before each item
+        self.changes = []   # (item, SYMTAB index, old address) per address set in place
+        self.pools = []     # (item, pending literals, LITTAB indexes placed) per pool
+        self.errors = []    # (item, message) per error printed
+
+    def begin(self, item, lc):
+        self.marks.append((len(self.ic), len(self.symbols), len(self.littab),
+                           len(self.pooltab), len(self.pool), lc))
+        self.items.append(item)
+
+    def set_address(self, index, address):
+        self.changes.append((len(self.items) - 1, index, self.addresses[index]))
+        self.addresses[index] = address
+
+    def error(self, message):
+        self.errors.append((len(self.items) - 1, message))
+        print(message)
+
+    def place_pool(self, lc):
+        """Places the pending literals from `lc`; returns the values laid out."""
+        pending = list(self.pool.pending.items())
+        placed, values = self.pool.place(self.littab, lc, self.error)
+        self.pools.append((len(self.items) - 1, pending, placed))
+        return values
+
+    def rollback(self, n):
+        """Undoes items n onwards; returns the LC to go on from."""
+        if n == len(self.items):
+            return self.lc
+        ic_len, symtab_len, littab_len, pooltab_len, pool_len, lc = self.marks[n]
+        changes = self.changes
+        addresses = self.addresses
+        while changes and changes[-1][0] >= n:
+            _, index, old = changes.pop()
+            addresses[index] = old
+        for name in self.symbols[symtab_len:]:
+            del self.symtab_map[name]
+        del self.symbols[symtab_len:]
+        del addresses[symtab_len:]
+
+        # The pool held its first pool_len literals then; the first pool
+        # placed since has them, otherwise they are still pending
+        pending = list(self.pool.pending.items())
+        while self.pools and self.pools[-1][0] >= n:
+            _, pending, placed = self.pools.pop()
+            for index in placed:
+                self.littab[index][1] = -1
+        self.pool.pending = dict(pending[:pool_len])
+        for literal, _ in self.littab[littab_len:]:
+            del self.littab_map[literal]
+        del self.littab[littab_len:]
+        del self.pooltab[pooltab_len:]
+        for name in IntermediateCode.__slots__:
+            del getattr(self.ic, name)[ic_len:]
+
+        while self.errors and self.errors[-1][0] >= n:
+            self.errors.pop()
+        del self.items[n:]
+        del self.marks[n:]
+        return lc
+
+    def tables(self):
+        """ass.pass1()'s results, as copies the caller may keep or change."""
+        ic = IntermediateCode()
+        for name in IntermediateCode.__slots__:
+            setattr(ic, name, getattr(self.ic, name)[:])
+        symtab = list(map(list, zip(self.symbols, self.addresses)))
+        return symtab, [entry[:] for entry in self.littab], self.pooltab[:], ic
+
+
+# --- Incremental Pass 1 ---
+class IncrementalAssembler:
+    """
+    Drop-in replacement for ass.pass1() that only parses blocks it has
+    not seen before. Blocks from the previous run are kept in memory and
+    others are looked up in the on-disk BlockCache (if cache_dir is
+    given); what remains is laying the blocks out, assigning symbol and
+    literal addresses and relocating their rows. The layout of the last
+    run is kept too, and reused up to the first block or directive that
+    changed.
+
+    After each run `stats` counts the blocks and where they came from;
+    `reused` are those whose layout was kept.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_CACHE_BYTES, block_lines=BLOCK_LINES):
+        self.cache = BlockCache(cache_dir, max_bytes) if cache_dir else None
+        self.block_lines = block_lines
+        self.memory = {}     # key -> Block, for the blocks of the last run
+        self.layout = None   # Layout of the last run
+        self.stats = {}
+
+    def _block(self, key, lines, found):
+        block = self.memory.get(key)
+        if block is not None:
+            self.stats["memory"] += 1
+        elif self.cache is not None and (block := self.cache.get(key)) is not None:
+            self.stats["disk"] += 1
+        else:
+            block = parse_block(lines)
+            self.stats["parsed"] += 1
+            if self.cache is not None:
+                self.cache.put(key, block)
+        found[key] = block
+        return block
+
+    def pass1(self, assembly_code, dedup_literals=False):
+        """
+        Same result as ass.pass1(assembly_code, dedup_literals=dedup_literals).
+        Returns: symtab, littab, pooltab, intermediate_code
+        """
+        stats = self.stats = {"blocks": 0, "memory": 0, "disk": 0, "parsed": 0, "reused": 0}
+        items = list(split_blocks(assembly_code, self.block_lines))
+        names = [tuple(item) if key is None else key for key, item in items]
+
+        # Keep the last run's layout up to the first item that changed,
+        # unless that is under half of it: undoing the rest then costs
+        # more than laying the program out afresh
+        layout = self.layout
+        n = 0
+        if layout is not None and layout.dedup_literals == dedup_literals:
+            last = layout.items
+            while n < len(names) and n < len(last) and names[n] == last[n]:
+                n += 1
+            if 2 * n < len(last):
+                n = 0
+        if n == 0:
+            layout = Layout(dedup_literals)
+        self.layout = None   # a run that fails part way leaves nothing to reuse
+        lc = layout.rollback(n)
+        for _, message in layout.errors:
+            print(message)
+
+        found = {}
+        for key, _ in items[:n]:
+            if key is not None:
+                found[key] = self.memory[key]
+                stats["blocks"] += 1
+                stats["memory"] += 1
+                stats["reused"] += 1
+
+        symtab_map = layout.symtab_map
+        symbols = layout.symbols
+        addresses = layout.addresses
+        littab_map = layout.littab_map
+        littab = layout.littab
+        pool = layout.pool
+        ic = layout.ic
+        changes = layout.changes
+        set_address = layout.set_address
+        error = layout.error
+
+        def define(label, addr):
+            if label not in symtab_map:
+                symtab_map[label] = len(symbols)
+                symbols.append(label)
+                addresses.append(addr)
+            elif addresses[symtab_map[label]] == -1:
+                set_address(symtab_map[label], addr)
+            else:
+                error(f"Error: Duplicate symbol '{label}'")
+
+        for number, ((key, item), name) in enumerate(zip(items[n:], names[n:]), n):
+            layout.begin(name, lc)
+
+            if key is not None:
+                block = self._block(key, item, found)
+                stats["blocks"] += 1
+                for message in block.errors:
+                    error(message)
+                for symbol in [symbol for symbol in block.names if symbol not in symtab_map]:
+                    symtab_map[symbol] = len(symbols)
+                    symbols.append(symbol)
+                    addresses.append(-1)
+                sym_ids = list(map(symtab_map.__getitem__, block.names))
+                for local, rel in block.labels:
+                    index = sym_ids[local]
+                    if addresses[index] == -1:
+                        changes.append((number, index, -1))
+                        addresses[index] = lc + rel
+                    else:
+                        error(f"Error: Duplicate symbol '{symbols[index]}'")
+                lit_ids = []
+                for literal in block.literals:
+                    if literal not in littab_map:
+                        littab_map[literal] = len(littab)
+                        littab.append([literal, -1])
+                    pool.add(literal, littab_map[literal])
+                    lit_ids.append(littab_map[literal])
+                relocate(ic, block.rows, lc, sym_ids, lit_ids)
+                lc += block.size
+                continue
+
+            label, opcode, op1, op2 = item
+            if label:
+                define(label, lc)
+
+            if opcode == 'START':
+                if op1:
+                    lc = int(op1)
+                ic.append(lc, AD, 1, CONST, lc)
+
+            elif opcode == 'EQU':
+                set_address(symtab_map[label], addresses[symtab_map[op1]])
+                ic.append(lc, AD, 4, SYM, symtab_map[op1])
+
+            elif opcode == 'ORIGIN':
+                if '+' in op1:
+                    sym, num = op1.split('+')
+                    lc = addresses[symtab_map[sym]] + int(num)
+                elif '-' in op1:
+                    sym, num = op1.split('-')
+                    lc = addresses[symtab_map[sym]] - int(num)
+                elif is_int(op1):
+                    lc = int(op1)
+                else:
+                    lc = addresses[symtab_map[op1]]
+                ic.append(lc, AD, 3)
+
+            else: # LTORG, END
+                ic.append(lc, *OPCODES[opcode])
+                if pool:
+                    values = layout.place_pool(lc)
+                    ic.extend((lc + i, DL, 1, CONST, value) for i, value in enumerate(values))
+                    lc += len(values)
+                    layout.pooltab.append(len(littab))
+
+        layout.lc = lc
+        self.memory = found
+        self.layout = layout
+        return layout.tables()
+
+
+def relocate(ic, rows, base, sym_ids, lit_ids):
+    """Appends a block's rows to `ic` at LC `base`, mapping operand indexes to table indexes."""
+    def operands(kinds, values):
+        return [sym_ids[v] if k == SYM else lit_ids[v] if k == LIT else v
+                for k, v in zip(kinds, values)]
+
+    ic.lc.extend([rel + base for rel in rows.lc])
+    ic.cls.extend(rows.cls)
+    ic.code.extend(rows.code)
+    ic.kind1.extend(rows.kind1)
+    ic.val1.extend(operands(rows.kind1, rows.val1))
+    ic.kind2.extend(rows.kind2)
+    ic.val2.extend(operands(rows.kind2, rows.val2))
+
+
+# --- Main Execution Block ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Assemble an ass.py source file, reusing cached blocks from earlier runs")
+    parser.add_argument("source")
+    parser.add_argument("-o", "--output", default="a.obj")
+    parser.add_argument("--cache-dir", default=".asmcache")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_BYTES >> 20,
+                        help="cache size limit in MiB")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    assembler = IncrementalAssembler(args.cache_dir, args.cache_size << 20)
+    symtab, littab, pooltab, ic = assembler.pass1(read_module(args.source))
+    pass2_object(ic, symtab, littab, args.output)
+    elapsed = time.perf_counter() - start
+
+    stats = assembler.stats
+    print(f"{stats['blocks']} blocks: {stats['disk']} cached, {stats['parsed']} assembled "
+          f"-> {args.output} in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,77 @@
+from array import array
+
+# --- Intermediate Representation shared by ass.py and Assembler1.py ---
+#
+# Pass 1 emits one row per statement and Pass 2 reads the rows back as
+# plain integers, so nothing is re-parsed from strings. A row is
+# (LC, class, opcode, kind1, value1, kind2, value2): the statement class
+# and the opcode number from OPTAB, then up to two operands, each a kind
+# code and an integer value. For SYM and LIT operands the value is an
+# index into the symbol or literal table.
+
+# Statement classes
+IS = 0   # imperative statement
+AD = 1   # assembler directive
+DL = 2   # declarative statement
+CLASS_NAMES = ("IS", "AD", "DL")
+CLASS_CODES = {name: code for code, name in enumerate(CLASS_NAMES)}
+
+# Operand kinds
+NONE = 0    # no operand
+CONST = 1   # constant value
+SYM = 2     # symbol table index
+LIT = 3     # literal table index
+REG = 4     # register or condition code
+KIND_NAMES = ("", "C", "S", "L", "R")
+
+
+class IntermediateCode:
+    """
+    Intermediate code kept as parallel array columns, one entry per row.
+    Opcodes, classes and kinds take a byte each and LC and operand values
+    eight, so a row costs 28 bytes instead of a list of tuples of strings.
+
+    Iterating yields each row as a tuple of ints; the columns can also be
+    used directly (e.g. with numpy.frombuffer).
+    """
+    __slots__ = ("lc", "cls", "code", "kind1", "val1", "kind2", "val2")
+    TYPECODES = ("q", "B", "B", "B", "q", "B", "q")
+
+    def __init__(self, rows=()):
+        for name, typecode in zip(self.__slots__, self.TYPECODES):
+            setattr(self, name, array(typecode))
+        self.extend(rows)
+
+    def append(self, lc, cls, code, kind1=NONE, val1=0, kind2=NONE, val2=0):
+        self.lc.append(lc)
+        self.cls.append(cls)
+        self.code.append(code)
+        self.kind1.append(kind1)
+        self.val1.append(val1)
+        self.kind2.append(kind2)
+        self.val2.append(val2)
+
+    def extend(self, rows):
+        append = self.append
+        for row in rows:
+            append(*row)
+
+    def __len__(self):
+        return len(self.lc)
+
+    def __getitem__(self, i):
+        return (self.lc[i], self.cls[i], self.code[i],
+                self.kind1[i], self.val1[i], self.kind2[i], self.val2[i])
+
+    def __iter__(self):
+        return zip(self.lc, self.cls, self.code,
+                   self.kind1, self.val1, self.kind2, self.val2)
+
+    def format(self, i):
+        """Row `i` in the usual textbook notation, e.g. "200 (IS,04) (R,1) (L,0)"."""
+        lc, cls, code, kind1, val1, kind2, val2 = self[i]
+        text = f"{lc} ({CLASS_NAMES[cls]},{code:02d})"
+        for kind, val in ((kind1, val1), (kind2, val2)):
+            if kind != NONE:
+                text += f" ({KIND_NAMES[kind]},{val})"
+        return text
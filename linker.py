@@ -0,0 +1,187 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from operator import itemgetter
+
+from ass import OPTAB, pass1, tokenize
+from ir import AD, DL, IS, LIT, NONE, SYM
+from objfile import ObjectWriter
+
+ENTRY = int(OPTAB['ENTRY'][1])
+EXTRN = int(OPTAB['EXTRN'][1])
+
+
+# --- Relocatable Modules ---
+class ObjectModule:
+    """
+    One assembled, relocatable module.
+
+    words are [LC, opcode, field 1, field 2] as pass2() would produce them
+    and reserves are (LC, count) for each DS, all at the addresses the
+    module was assembled for (from `origin`). relocations lists the
+    (word index, position) of every field holding an address inside the
+    module; externals lists (word index, position, name) for fields that
+    refer to another module's ENTRY. exports maps ENTRY names to
+    addresses.
+    """
+    __slots__ = ("name", "origin", "size", "words", "reserves",
+                 "relocations", "externals", "exports")
+
+    def __init__(self, name, origin=0):
+        self.name = name
+        self.origin = origin
+        self.size = 0
+        self.words = []
+        self.reserves = []
+        self.relocations = []
+        self.externals = []
+        self.exports = {}
+
+
+def read_module(path):
+    """Reads a source file into ass.py's [label, opcode, op1, op2] lines."""
+    with open(path) as f:
+        return list(tokenize(f.read()))
+
+
+def assemble_module(name, assembly_code):
+    """Runs Pass 1 and a relocating Pass 2 over one module's source."""
+    symtab, littab, pooltab, ic = pass1(assembly_code)
+
+    externals = set()
+    entries = []
+    for LC, opclass, opnum, kind1, val1, kind2, val2 in ic:
+        if opclass == AD and opnum == EXTRN:
+            externals.add(symtab[val1][0])
+        elif opclass == AD and opnum == ENTRY:
+            entries.append(symtab[val1][0])
+
+    module = ObjectModule(name)
+    end = 0
+    for LC, opclass, opnum, kind1, val1, kind2, val2 in ic:
+        if opclass == AD:
+            if opnum == 1: # START
+                module.origin = end = val1
+            continue
+
+        if opclass == DL and opnum == 2: # DS
+            module.reserves.append((LC, val1))
+            end = max(end, LC + val1)
+            continue
+
+        word = [LC, opnum if opclass == IS else 0]
+        if opclass == IS:
+            for kind, val in ((kind1, val1), (kind2, val2)):
+                if kind == SYM:
+                    symbol, addr = symtab[val]
+                    if symbol in externals:
+                        module.externals.append((len(module.words), len(word), symbol))
+                        addr = 0
+                    elif addr == -1:
+                        print(f"Error: Symbol '{symbol}' was used but not defined in '{name}'.")
+                    else:
+                        module.relocations.append((len(module.words), len(word)))
+                    word.append(addr)
+                elif kind == LIT:
+                    module.relocations.append((len(module.words), len(word)))
+                    word.append(littab[val][1])
+                elif kind != NONE:
+                    word.append(val)
+            word += [0] * (4 - len(word))
+        else: # DC (or literal)
+            word += [0, val1]
+        module.words.append(word)
+        end = max(end, LC + 1)
+
+    module.size = end - module.origin
+    addresses = dict(symtab)
+    for symbol in entries:
+        addr = addresses[symbol]
+        if addr == -1:
+            print(f"Error: ENTRY symbol '{symbol}' is not defined in '{name}'.")
+        else:
+            module.exports[symbol] = addr
+    return module
+
+
+def assemble_file(path):
+    return assemble_module(path, read_module(path))
+
+
+def assemble_modules(paths, workers=None):
+    """
+    Assembles source files in a process pool, one module per file, and
+    returns their ObjectModules in the same order.
+    """
+    workers = workers or os.cpu_count()
+    if workers == 1 or len(paths) == 1:
+        return [assemble_file(path) for path in paths]
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(assemble_file, paths, chunksize=chunksize))
+
+
+# --- Linker ---
+def link(modules, path, base=0):
+    """
+    Places `modules` one after another from address `base`, relocates
+    their addresses, patches external references and writes the program
+    to `path` as an object file (see objfile.py).
+    Returns: the global symbol table (ENTRY name -> linked address)
+    """
+    # 1. Layout: each module's offset from its assembled addresses
+    offsets = []
+    address = base
+    for module in modules:
+        offsets.append(address - module.origin)
+        address += module.size
+
+    # 2. Global symbol table
+    global_symbols = {}
+    for module, offset in zip(modules, offsets):
+        for symbol, addr in module.exports.items():
+            if symbol in global_symbols:
+                print(f"Error: Duplicate ENTRY symbol '{symbol}' in '{module.name}'")
+            else:
+                global_symbols[symbol] = addr + offset
+
+    # 3. Relocate, patch and write
+    with open(path, "wb") as f:
+        out = ObjectWriter(f)
+        for module, offset in zip(modules, offsets):
+            words = [word[:] for word in module.words]
+            for index, position in module.relocations:
+                words[index][position] += offset
+            for index, position, symbol in module.externals:
+                if symbol in global_symbols:
+                    words[index][position] = global_symbols[symbol]
+                else:
+                    print(f"Error: Unresolved external '{symbol}' in '{module.name}'")
+                    words[index][position] = -1
+
+            # Words and DS reservations in address order
+            for item in sorted(chain(words, module.reserves), key=itemgetter(0)):
+                if len(item) == 2:
+                    out.reserve(item[0] + offset, item[1])
+                else:
+                    out.word(item[0] + offset, *item[1:])
+        out.finish(global_symbols.items(), base)
+
+    return global_symbols
+
+
+# --- Main Execution Block ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Assemble ass.py source modules in parallel and link them into one object file")
+    parser.add_argument("sources", nargs="+", help="source files, one module each")
+    parser.add_argument("-o", "--output", default="a.obj")
+    parser.add_argument("--base", type=int, default=0, help="load address of the first module")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    args = parser.parse_args()
+
+    modules = assemble_modules(args.sources, args.workers)
+    symbols = link(modules, args.output, args.base)
+    size = sum(module.size for module in modules)
+    print(f"Linked {len(modules)} modules, {size} words, {len(symbols)} global symbols -> {args.output}")
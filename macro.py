@@ -1,5 +1,7 @@
 import json
 
+from passhooks import start_phase
+
 MNT = {}
 # MDT (Macro Definition Table): [ "line 1", "line 2", ... ]
 MDT = []
@@ -38,11 +40,13 @@ END
 
 # --- Pass 1 Function ---
 
-def pass1():
+def pass1(hook=None):
     """
     Performs Pass 1: Builds MNT, MDT, and intermediate.asm.
     Handles default parameters in macro definitions.
+    With `hook`, it is called with a passhooks.PhaseReport at the end.
     """
+    timer = start_phase(hook, "macro", "pass1")
     print("Building MNT, MDT, and intermediate.asm...")
     
     mnt = {}
@@ -51,6 +55,8 @@ def pass1():
     macro_state = "NONE" # "NONE", "HEADER", "BODY"
     
     with open("macro_input.asm", "r") as f_in, open("intermediate.asm", "w") as f_out:
+        if timer:
+            f_in, f_out = timer.file(f_in), timer.file(f_out)
         for line in f_in:
             line = line.strip()
             if not line:
@@ -99,18 +105,24 @@ def pass1():
                 # This is regular code, write to intermediate
                 f_out.write(line + "\n")
                 
+    if timer:
+        timer.finish(macros=len(mnt), mdt_lines=len(mdt), lines_out=timer.writes)
     return mnt, mdt
 
 # --- Pass 2 Function ---
 
-def pass2(mnt, mdt):
+def pass2(mnt, mdt, hook=None):
     """
     Performs Pass 2: Expands macros from intermediate.asm.
     Handles positional, keyword, and default parameters.
+    With `hook`, it is called with a passhooks.PhaseReport at the end.
     """
+    timer = start_phase(hook, "macro", "pass2")
     print("Expanding macros and writing expanded.asm...")
     
     with open("intermediate.asm", "r") as f_in, open("expanded.asm", "w") as f_out:
+        if timer:
+            f_in, f_out = timer.file(f_in), timer.file(f_out)
         for line in f_in:
             line = line.strip()
             if not line:
@@ -185,6 +197,9 @@ def pass2(mnt, mdt):
                 # --- This is Regular Assembly Code ---
                 f_out.write(line + "\n")
 
+    if timer:
+        timer.finish(macros=len(mnt), mdt_lines=len(mdt), lines_out=timer.writes)
+
 # --- Main Execution Block ---
 if __name__ == "__main__":
     
@@ -0,0 +1,164 @@
+import mmap
+import os
+import struct
+from bisect import bisect_right
+
+# --- Object File Format shared by ass.py and Assembler1.py ---
+#
+# HEADER, then the blocks, then the symbol table. A block is a BLOCK
+# record (kind, address, word count). A DATA block is followed by `count`
+# WORDs for consecutive addresses. A ZERO block has nothing after it: it
+# stands for `count` zero words, which is how DS reservations are stored,
+# so they cost one record whatever their size. A symbol is a SYMBOL record
+# followed by the name in UTF-8.
+
+MAGIC = b"OBJ2"   # OBJ1 had 32-bit word fields
+# Format: (magic, symbol count, block count, start address, symbol table offset)
+HEADER = struct.Struct("<4sIIqq")
+BLOCK = struct.Struct("<BqI")
+BLOCK_DATA = 0
+BLOCK_ZERO = 1
+# Format: (opcode, field 1, field 2), as in a machine code row. The
+# fields are 64-bit, like the values in ir.py rows, so any constant
+# pass 1 accepts can be written.
+WORD = struct.Struct("<qqq")
+SYMBOL = struct.Struct("<qH")   # address, name length
+
+DATA_CHUNK = 65536  # words buffered before a DATA block is written out
+
+
+class ObjectWriter:
+    """
+    Writes an object file to the binary file `f` as words are added.
+    Consecutive words and reservations are merged into blocks, and at
+    most DATA_CHUNK words are buffered in memory. Call finish() once at
+    the end to write the symbol table and the header.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.block_count = 0
+        self.kind = None
+        self.address = 0
+        self.count = 0
+        self.data = bytearray()
+        f.write(HEADER.pack(MAGIC, 0, 0, 0, 0))   # rewritten by finish()
+
+    def _start_block(self, kind, address):
+        if self.kind != kind or address != self.address + self.count:
+            self._flush()
+            self.kind = kind
+            self.address = address
+
+    def _flush(self):
+        if self.count:
+            self.f.write(BLOCK.pack(self.kind, self.address, self.count))
+            self.f.write(self.data)
+            self.block_count += 1
+        self.kind = None
+        self.count = 0
+        self.data = bytearray()
+
+    def word(self, address, opcode, field1, field2):
+        """Adds one machine word at `address`."""
+        self._start_block(BLOCK_DATA, address)
+        self.data += WORD.pack(opcode, field1, field2)
+        self.count += 1
+        if self.count == DATA_CHUNK:
+            self._flush()
+
+    def reserve(self, address, count):
+        """Adds `count` zero words starting at `address` (a DS)."""
+        if count > 0:
+            self._start_block(BLOCK_ZERO, address)
+            self.count += count
+
+    def finish(self, symbols, start=0):
+        """Writes the symbol table, an iterable of (name, address), and the header."""
+        self._flush()
+        f = self.f
+        offset = f.tell()
+        symbol_count = 0
+        for name, address in symbols:
+            data = name.encode()
+            f.write(SYMBOL.pack(address, len(data)) + data)
+            symbol_count += 1
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, symbol_count, self.block_count, start, offset))
+        f.seek(0, 2)
+
+
+class ObjectFile:
+    """
+    Read-only view of an object file through mmap. Opening it only reads
+    the block and symbol tables; words are decoded when asked for, so
+    looking up one address in a large program touches one page.
+
+    `symbols` maps name -> address and `start` is the program's START
+    address. obj[address] returns the (opcode, field 1, field 2) word
+    there and raises KeyError for addresses the program does not cover.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise ValueError(f"{path}: not an object file")
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, symbol_count, block_count, self.start, offset = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            self.map.close()
+            raise ValueError(f"{path}: not an object file")
+
+        # Format: (address, count, kind, offset of the first word)
+        self.blocks = []
+        position = HEADER.size
+        for _ in range(block_count):
+            kind, address, count = BLOCK.unpack_from(self.map, position)
+            position += BLOCK.size
+            self.blocks.append((address, count, kind, position))
+            if kind == BLOCK_DATA:
+                position += count * WORD.size
+
+        self.symbols = {}
+        for _ in range(symbol_count):
+            address, length = SYMBOL.unpack_from(self.map, offset)
+            offset += SYMBOL.size
+            self.symbols[self.map[offset:offset + length].decode()] = address
+            offset += length
+
+        self._by_address = sorted(self.blocks)
+        self._addresses = [block[0] for block in self._by_address]
+
+    def __len__(self):
+        """Number of words, reserved ones included."""
+        return sum(block[1] for block in self.blocks)
+
+    def __getitem__(self, address):
+        i = bisect_right(self._addresses, address) - 1
+        if i >= 0:
+            start, count, kind, position = self._by_address[i]
+            if address < start + count:
+                if kind == BLOCK_ZERO:
+                    return (0, 0, 0)
+                return WORD.unpack_from(self.map, position + (address - start) * WORD.size)
+        raise KeyError(address)
+
+    def words(self):
+        """Yields (address, opcode, field 1, field 2) for every word in file order."""
+        for address, count, kind, position in self.blocks:
+            if kind == BLOCK_ZERO:
+                for i in range(count):
+                    yield (address + i, 0, 0, 0)
+            else:
+                data = self.map[position:position + count * WORD.size]
+                for i, word in enumerate(WORD.iter_unpack(data)):
+                    yield (address + i,) + word
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,149 @@
+import time
+
+
+# --- Reports ---
+class PhaseReport:
+    """
+    What a pass hands its hook when it finishes. Times are in seconds and
+    io_s is the part of wall_s spent inside file reads and writes; lines
+    is the number of source lines (or rows) the pass went through.
+    counters holds the pass's own figures: table sizes, forward
+    references and so on.
+    """
+    __slots__ = ("tool", "phase", "wall_s", "cpu_s", "io_s", "lines", "counters")
+
+    def __init__(self, tool, phase, wall_s, cpu_s, io_s, lines, counters):
+        self.tool = tool
+        self.phase = phase
+        self.wall_s = wall_s
+        self.cpu_s = cpu_s
+        self.io_s = io_s
+        self.lines = lines
+        self.counters = counters
+
+    @property
+    def processing_s(self):
+        return self.wall_s - self.io_s
+
+    @property
+    def lines_per_s(self):
+        return self.lines / self.wall_s if self.wall_s else 0.0
+
+    def as_dict(self):
+        return {
+            "tool": self.tool, "phase": self.phase,
+            "wall_s": self.wall_s, "cpu_s": self.cpu_s,
+            "io_s": self.io_s, "processing_s": self.processing_s,
+            "lines": self.lines, "lines_per_s": self.lines_per_s,
+            "counters": dict(self.counters),
+        }
+
+    def __str__(self):
+        counters = " ".join(f"{name}={value}" for name, value in self.counters.items())
+        return (f"{self.tool}.{self.phase}: {self.wall_s * 1000:.2f} ms wall, "
+                f"{self.cpu_s * 1000:.2f} ms CPU, {self.io_s * 1000:.2f} ms I/O, "
+                f"{self.lines} lines ({self.lines_per_s:.0f}/s) {counters}")
+
+
+class PhaseLog:
+    """A hook that keeps every PhaseReport it is given, in order."""
+
+    def __init__(self):
+        self.reports = []
+
+    def __call__(self, report):
+        self.reports.append(report)
+
+    def format(self):
+        return "\n".join(str(report) for report in self.reports)
+
+
+# --- Timing ---
+# A pass takes hook=None and starts with `timer = start_phase(hook, ...)`.
+# Everything else it does for the hook sits behind `if timer:`, once
+# before and once after its main loop, so a pass without a hook runs
+# exactly as it would without this module.
+def start_phase(hook, tool, phase):
+    """A PhaseTimer reporting to `hook`, or None when there is no hook."""
+    return None if hook is None else PhaseTimer(hook, tool, phase)
+
+
+class PhaseTimer:
+    """
+    Clock readings and tallies for one run of a pass. count() and file()
+    wrap the pass's input and files so lines and I/O time are counted
+    without touching its loop; finish() builds the report and calls the
+    hook.
+    """
+
+    def __init__(self, hook, tool, phase):
+        self.hook = hook
+        self.tool = tool
+        self.phase = phase
+        self.lines = 0
+        self.writes = 0
+        self.io_s = 0.0
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+
+    def count(self, iterable):
+        """Yields the items of `iterable`, counting each as a line."""
+        for item in iterable:
+            self.lines += 1
+            yield item
+
+    def file(self, f):
+        return TimedFile(f, self)
+
+    def finish(self, **counters):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        self.hook(PhaseReport(self.tool, self.phase, wall, cpu, self.io_s, self.lines, counters))
+
+
+class TimedFile:
+    """
+    A file wrapper adding the time spent in each read and write to its
+    PhaseTimer's io_s. Lines read by iterating count as the pass's lines
+    and every write call adds one to `writes`; anything else goes
+    straight to the file.
+    """
+
+    def __init__(self, f, timer):
+        self.f = f
+        self.timer = timer
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            line = next(self.f)
+        finally:
+            self.timer.io_s += time.perf_counter() - start
+        self.timer.lines += 1
+        return line
+
+    def read(self, *args):
+        start = time.perf_counter()
+        try:
+            return self.f.read(*args)
+        finally:
+            self.timer.io_s += time.perf_counter() - start
+
+    def write(self, data):
+        start = time.perf_counter()
+        try:
+            return self.f.write(data)
+        finally:
+            self.timer.io_s += time.perf_counter() - start
+            self.timer.writes += 1
+
+    def writelines(self, lines):
+        # One write per line, so producing the lines is not timed as I/O
+        for line in lines:
+            self.write(line)
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
@@ -1,58 +1,269 @@
+import queue
 import threading
 import time
 
+from histogram import LatencyHistogram
+
 BUFFER_SIZE = 5
-buffer = [None] * BUFFER_SIZE
-in_pos = 0
-out_pos = 0
 
-# -------- SEMAPHORES --------
-empty = threading.Semaphore(BUFFER_SIZE)  # empty slots
-full = threading.Semaphore(0)             # filled slots
-mutex = threading.Lock()                  # binary lock (mutex)
+now = time.perf_counter_ns
+
+
+class BufferClosed(Exception):
+    """
+    Raised by put() after close(), and by get() once closed and drained.
+    `delivered` is how many items put_many() stored before the close.
+    """
+
+    def __init__(self, *args, delivered=0):
+        super().__init__(*args)
+        self.delivered = delivered
+
+
+# -------- INSTRUMENTATION --------
+class BufferStats:
+    """
+    Counters and histograms kept by an instrumented BoundedBuffer, all
+    updated under the buffer's mutex. Wait times are in nanoseconds and
+    only cover calls that actually blocked; occupancy is the fill level
+    each put/get left behind.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.items_put = 0
+        self.items_got = 0
+        self.blocked_puts = 0             # put calls that waited for a slot
+        self.blocked_gets = 0             # get calls that waited for an item
+        self.put_wait = LatencyHistogram()
+        self.get_wait = LatencyHistogram()
+        self.occupancy = LatencyHistogram()
+
+    def snapshot(self, size):
+        """Returns the figures as a dict; `size` is the buffer's capacity."""
+        elapsed = time.monotonic() - self.started
+        return {
+            "elapsed_s": round(elapsed, 4),
+            "items_put": self.items_put,
+            "items_got": self.items_got,
+            "items_per_s": round(self.items_got / elapsed, 1) if elapsed else 0.0,
+            "blocked_puts": self.blocked_puts,
+            "blocked_gets": self.blocked_gets,
+            "put_wait_ns": self.put_wait.summary(),
+            "get_wait_ns": self.get_wait.summary(),
+            "occupancy": self.occupancy.summary(),
+            "mean_fill": round(self.occupancy.mean / size, 3) if size else 0.0,
+        }
+
 
-def producer():
-    global buffer, in_pos
+# -------- BOUNDED BUFFER --------
+class BoundedBuffer:
+    """
+    Fixed-size ring buffer shared by any number of producer and consumer
+    threads.
 
-    for item in range(1, 11):
+    One mutex guards the ring (in_pos/out_pos modulo size); producers wait
+    on `not_full` and consumers on `not_empty`, both conditions on that
+    mutex. put_many()/get_many() move a whole batch per lock acquisition.
 
-        empty.acquire()   # wait for empty slot
-        mutex.acquire()   # enter critical section
+    close() is the poison pill: producers can no longer put, and consumers
+    drain what is left and then get BufferClosed (iteration just stops).
 
-        buffer[in_pos] = item
-        print(f"Producer produced: {item}")
-        in_pos = (in_pos + 1) % BUFFER_SIZE
+    With instrument=True the buffer keeps a BufferStats in `stats`;
+    otherwise `stats` is None and nothing is measured.
+    """
 
-        mutex.release()   # exit critical section
-        full.release()    # increase filled slots
+    def __init__(self, size=BUFFER_SIZE, instrument=False):
+        self.size = size
+        self.buffer = [None] * size
+        self.in_pos = 0
+        self.out_pos = 0
+        self.count = 0
+        self.closed = False
+        self.stats = BufferStats() if instrument else None
 
-        time.sleep(1)
+        self.mutex = threading.Lock()
+        self.not_full = threading.Condition(self.mutex)    # waits for empty slots
+        self.not_empty = threading.Condition(self.mutex)   # waits for filled slots
 
+    def __len__(self):
+        return self.count
 
-def consumer():
-    global buffer, out_pos
+    @staticmethod
+    def _wait(condition, deadline):
+        """One wait on condition; returns False if the deadline has passed."""
+        if deadline is None:
+            condition.wait()
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        condition.wait(remaining)
+        return True
 
-    for _ in range(10):
+    def put(self, item, timeout=None):
+        """
+        Stores one item, waiting for an empty slot. Raises queue.Full on
+        timeout and BufferClosed if the buffer is closed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.mutex:
+            blocked_at = now() if self.stats and self.count == self.size else None
+            while self.count == self.size and not self.closed:
+                if not self._wait(self.not_full, deadline):
+                    raise queue.Full
+            if self.closed:
+                raise BufferClosed
+            self.buffer[self.in_pos] = item
+            self.in_pos = (self.in_pos + 1) % self.size
+            self.count += 1
+            self.not_empty.notify()
+            if self.stats:
+                self._record_put(1, blocked_at)
 
-        full.acquire()    # wait for filled slot
-        mutex.acquire()   # enter critical section
+    def put_many(self, items, timeout=None):
+        """
+        Stores a sequence of items in order, as many per lock acquisition
+        as there are empty slots. Returns how many were stored, which is
+        less than len(items) only if `timeout` expired. Raises
+        BufferClosed if the buffer is closed, with the number already
+        stored in its `delivered`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = 0
+        with self.mutex:
+            while done < len(items):
+                blocked_at = now() if self.stats and self.count == self.size else None
+                while self.count == self.size and not self.closed:
+                    if not self._wait(self.not_full, deadline):
+                        return done
+                if self.closed:
+                    raise BufferClosed(delivered=done)
+                n = min(self.size - self.count, len(items) - done)
+                for item in items[done:done + n]:
+                    self.buffer[self.in_pos] = item
+                    self.in_pos = (self.in_pos + 1) % self.size
+                self.count += n
+                done += n
+                self.not_empty.notify(n)
+                if self.stats:
+                    self._record_put(n, blocked_at)
+        return done
 
-        item = buffer[out_pos]
-        print(f"  Consumer consumed: {item}")
-        out_pos = (out_pos + 1) % BUFFER_SIZE
+    def get(self, timeout=None):
+        """
+        Removes and returns one item, waiting for a filled slot. Raises
+        queue.Empty on timeout and BufferClosed once closed and drained.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.mutex:
+            blocked_at = now() if self.stats and not self.count else None
+            while not self.count and not self.closed:
+                if not self._wait(self.not_empty, deadline):
+                    raise queue.Empty
+            if not self.count:
+                raise BufferClosed
+            item = self.buffer[self.out_pos]
+            self.buffer[self.out_pos] = None
+            self.out_pos = (self.out_pos + 1) % self.size
+            self.count -= 1
+            self.not_full.notify()
+            if self.stats:
+                self._record_get(1, blocked_at)
+            return item
 
-        mutex.release()   # exit critical section
-        empty.release()   # increase empty slots
+    def get_many(self, max_items, timeout=None):
+        """
+        Waits for at least one item, then removes and returns up to
+        max_items in one lock acquisition. Raises queue.Empty on timeout
+        and BufferClosed once closed and drained.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.mutex:
+            blocked_at = now() if self.stats and not self.count else None
+            while not self.count and not self.closed:
+                if not self._wait(self.not_empty, deadline):
+                    raise queue.Empty
+            if not self.count:
+                raise BufferClosed
+            n = min(self.count, max_items)
+            items = []
+            for _ in range(n):
+                items.append(self.buffer[self.out_pos])
+                self.buffer[self.out_pos] = None
+                self.out_pos = (self.out_pos + 1) % self.size
+            self.count -= n
+            self.not_full.notify(n)
+            if self.stats:
+                self._record_get(n, blocked_at)
+            return items
 
-        time.sleep(1)
+    def _record_put(self, n, blocked_at):
+        stats = self.stats
+        stats.items_put += n
+        stats.occupancy.record(self.count)
+        if blocked_at is not None:
+            stats.blocked_puts += 1
+            stats.put_wait.record(now() - blocked_at)
+
+    def _record_get(self, n, blocked_at):
+        stats = self.stats
+        stats.items_got += n
+        stats.occupancy.record(self.count)
+        if blocked_at is not None:
+            stats.blocked_gets += 1
+            stats.get_wait.record(now() - blocked_at)
+
+    def snapshot(self):
+        """Returns the instrumentation figures as a dict (instrument=True only)."""
+        with self.mutex:
+            return self.stats.snapshot(self.size)
+
+    def close(self):
+        """Stops producers and lets consumers finish once the buffer drains."""
+        with self.mutex:
+            self.closed = True
+            self.not_full.notify_all()
+            self.not_empty.notify_all()
+
+    def __iter__(self):
+        """Yields items until the buffer is closed and drained."""
+        while True:
+            try:
+                yield self.get()
+            except BufferClosed:
+                return
+
+
+def producer(buffer, items, name="Producer"):
+    for item in items:
+        buffer.put(item)
+        print(f"{name} produced: {item}")
+
+
+def consumer(buffer, name="Consumer"):
+    for item in buffer:
+        print(f"  {name} consumed: {item}")
 
 
 # -------- MAIN --------
-producer_thread = threading.Thread(target=producer)
-consumer_thread = threading.Thread(target=consumer)
+if __name__ == "__main__":
+    buffer = BoundedBuffer(BUFFER_SIZE)
+
+    producer_threads = [
+        threading.Thread(target=producer, args=(buffer, range(start, start + 10), f"Producer {n}"))
+        for n, start in enumerate((1, 101), 1)
+    ]
+    consumer_threads = [
+        threading.Thread(target=consumer, args=(buffer, f"Consumer {n}"))
+        for n in (1, 2)
+    ]
 
-producer_thread.start()
-consumer_thread.start()
+    for t in producer_threads + consumer_threads:
+        t.start()
 
-producer_thread.join()
-consumer_thread.join()
+    for t in producer_threads:
+        t.join()
+    buffer.close()   # consumers drain the rest, then stop
+    for t in consumer_threads:
+        t.join()
@@ -0,0 +1,192 @@
+import asyncio
+from collections import deque
+
+from prod import BUFFER_SIZE, BufferClosed
+
+
+# -------- ASYNC BOUNDED BUFFER --------
+class AsyncBoundedBuffer:
+    """
+    asyncio counterpart of prod.py's BoundedBuffer. put() suspends the
+    producer while the buffer is full, which is the backpressure: a fast
+    producer runs only as fast as its consumers. A waiting producer costs
+    a suspended coroutine instead of a blocked thread.
+
+    Same API and close() semantics as BoundedBuffer, with coroutines.
+    Wrap calls in asyncio.wait_for() for timeouts.
+    """
+
+    def __init__(self, size=BUFFER_SIZE):
+        self.size = size
+        self.buffer = deque()
+        self.closed = False
+        mutex = asyncio.Lock()
+        self.not_full = asyncio.Condition(mutex)    # waits for empty slots
+        self.not_empty = asyncio.Condition(mutex)   # waits for filled slots
+
+    def __len__(self):
+        return len(self.buffer)
+
+    async def put(self, item):
+        """Stores one item, waiting for an empty slot. Raises BufferClosed after close()."""
+        async with self.not_full:
+            await self.not_full.wait_for(lambda: len(self.buffer) < self.size or self.closed)
+            if self.closed:
+                raise BufferClosed
+            self.buffer.append(item)
+            self.not_empty.notify()
+
+    async def put_many(self, items):
+        """
+        Stores a sequence of items, as many per wake-up as there is room
+        for. Returns how many were stored, i.e. len(items). BufferClosed
+        carries the number already stored in `delivered`.
+        """
+        done = 0
+        async with self.not_full:
+            while done < len(items):
+                await self.not_full.wait_for(lambda: len(self.buffer) < self.size or self.closed)
+                if self.closed:
+                    raise BufferClosed(delivered=done)
+                n = min(self.size - len(self.buffer), len(items) - done)
+                self.buffer.extend(items[done:done + n])
+                done += n
+                self.not_empty.notify(n)
+        return done
+
+    async def get(self):
+        """Removes and returns one item. Raises BufferClosed once closed and drained."""
+        async with self.not_empty:
+            await self.not_empty.wait_for(lambda: self.buffer or self.closed)
+            if not self.buffer:
+                raise BufferClosed
+            item = self.buffer.popleft()
+            self.not_full.notify()
+            return item
+
+    async def get_many(self, max_items):
+        """Waits for at least one item, then returns up to max_items of them."""
+        async with self.not_empty:
+            await self.not_empty.wait_for(lambda: self.buffer or self.closed)
+            if not self.buffer:
+                raise BufferClosed
+            n = min(len(self.buffer), max_items)
+            items = [self.buffer.popleft() for _ in range(n)]
+            self.not_full.notify(n)
+            return items
+
+    async def close(self):
+        """Stops producers and lets consumers finish once the buffer drains."""
+        async with self.not_full:
+            self.closed = True
+            self.not_full.notify_all()
+            self.not_empty.notify_all()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.get()
+        except BufferClosed:
+            raise StopAsyncIteration
+
+
+# -------- PIPELINE --------
+async def _feed(source, out):
+    if hasattr(source, "__aiter__"):
+        async for item in source:
+            await out.put(item)
+    else:
+        for item in source:
+            await out.put(item)
+
+
+async def _work(func, inp, out):
+    async for item in inp:
+        await out.put(await func(item))
+
+
+async def _run_stage(workers, out):
+    # Closes the stage's output once every worker is done, so the next
+    # stage drains and stops in turn.
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        await out.close()
+
+
+async def pipeline(source, stages, size=BUFFER_SIZE):
+    """
+    Runs `source` (an iterable or async iterable) through a chain of
+    stages connected by AsyncBoundedBuffers of `size`, and yields what
+    the last stage produces. Each stage is an async function of one item,
+    or a (function, workers) pair to run several copies concurrently;
+    with more than one worker a stage may reorder items.
+
+    Closing the generator early (or cancelling its consumer) cancels every
+    stage; an exception in any stage cancels the rest and is re-raised
+    here.
+    """
+    buffers = [AsyncBoundedBuffer(size) for _ in range(len(stages) + 1)]
+    tasks = [asyncio.ensure_future(_run_stage([_feed(source, buffers[0])], buffers[0]))]
+    for i, stage in enumerate(stages):
+        func, workers = stage if isinstance(stage, tuple) else (stage, 1)
+        coros = [_work(func, buffers[i], buffers[i + 1]) for _ in range(workers)]
+        tasks.append(asyncio.ensure_future(_run_stage(coros, buffers[i + 1])))
+
+    try:
+        async for item in buffers[-1]:
+            yield item
+        # A failed stage closes its output early; upstream tasks may then
+        # be stuck, so look for the failure instead of awaiting in order.
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if task.exception() is not None:
+                raise task.exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def producer(buffer, items):
+    for item in items:
+        await asyncio.sleep(0.001)   # stands in for socket/file I/O
+        await buffer.put(item)
+
+
+async def consumer(buffer, name="Consumer"):
+    count = 0
+    async for item in buffer:
+        count += 1
+    print(f"  {name} consumed {count} items")
+
+
+# -------- MAIN --------
+async def main():
+    # Thousands of I/O-bound producers on one event loop
+    buffer = AsyncBoundedBuffer(BUFFER_SIZE)
+    producers = [asyncio.create_task(producer(buffer, range(10)))
+                 for _ in range(2000)]
+    consumers = [asyncio.create_task(consumer(buffer, f"Consumer {n}")) for n in (1, 2)]
+    await asyncio.gather(*producers)
+    await buffer.close()   # consumers drain the rest, then stop
+    await asyncio.gather(*consumers)
+
+    # A two-stage pipeline: 50 concurrent fetchers feeding one squarer
+    async def fetch(n):
+        await asyncio.sleep(0.001)
+        return n
+
+    async def square(n):
+        return n * n
+
+    total = 0
+    async for value in pipeline(range(1000), [(fetch, 50), square]):
+        total += value
+    print(f"Pipeline sum of squares: {total}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,161 @@
+import multiprocessing as mp
+import queue
+import struct
+from multiprocessing import shared_memory
+
+from prod import BUFFER_SIZE, BufferClosed
+
+SLOT_SIZE = 256                 # default bytes per item
+HEADER = struct.Struct("qqq")   # items put, items got, closed flag
+COUNT = struct.Struct("q")
+LENGTH = struct.Struct("I")     # per-slot item length
+
+
+# -------- SHARED-MEMORY RING BUFFER --------
+class SharedRingBuffer:
+    """
+    prod.py's ring buffer for producers and consumers in separate
+    processes. The slots and the position counters live in a
+    multiprocessing.shared_memory block, so items are copied in and out as
+    raw bytes instead of being pickled through a pipe.
+
+    Synchronisation follows prod.py: `empty` and `full` semaphores count
+    free and filled slots, and a lock per end guards that end's counter
+    (in_pos/out_pos are the counters modulo slots), so producers and
+    consumers never contend for the same lock.
+
+    Items are bytes-like objects of at most slot_size bytes. Pass the
+    buffer to child processes as a Process argument; the creating process
+    should call unlink() once everyone is done. close() has the same
+    poison-pill meaning as BoundedBuffer.close().
+    """
+
+    def __init__(self, slots=BUFFER_SIZE, slot_size=SLOT_SIZE, ctx=None):
+        ctx = ctx or mp.get_context()
+        self.slots = slots
+        self.slot_size = slot_size
+        self.stride = LENGTH.size + slot_size
+        self.shm = shared_memory.SharedMemory(
+            create=True, size=HEADER.size + slots * self.stride)
+        HEADER.pack_into(self.shm.buf, 0, 0, 0, 0)
+
+        self.empty = ctx.Semaphore(slots)   # empty slots
+        self.full = ctx.Semaphore(0)        # filled slots
+        self.put_lock = ctx.Lock()          # guards the put counter
+        self.get_lock = ctx.Lock()          # guards the get counter
+
+    def __getstate__(self):
+        return (self.shm.name, self.slots, self.slot_size,
+                self.empty, self.full, self.put_lock, self.get_lock)
+
+    def __setstate__(self, state):
+        (name, self.slots, self.slot_size,
+         self.empty, self.full, self.put_lock, self.get_lock) = state
+        self.stride = LENGTH.size + self.slot_size
+        self.shm = shared_memory.SharedMemory(name=name)
+
+    def put(self, data, timeout=None):
+        """
+        Copies one item into the next free slot. Raises ValueError if it
+        is larger than slot_size, queue.Full on timeout and BufferClosed
+        after close().
+        """
+        size = len(data)
+        if size > self.slot_size:
+            raise ValueError(f"Item of {size} bytes exceeds slot size {self.slot_size}")
+        if not self.empty.acquire(timeout=timeout):   # wait for empty slot
+            raise queue.Full
+        buf = self.shm.buf
+        with self.put_lock:
+            put_count, _, closed = HEADER.unpack_from(buf, 0)
+            if closed:
+                self.empty.release()   # pass the wake-up on to the next producer
+                raise BufferClosed
+            offset = HEADER.size + (put_count % self.slots) * self.stride
+            LENGTH.pack_into(buf, offset, size)
+            buf[offset + LENGTH.size:offset + LENGTH.size + size] = data
+            COUNT.pack_into(buf, 0, put_count + 1)
+        self.full.release()   # increase filled slots
+
+    def get(self, timeout=None):
+        """
+        Removes and returns the oldest item as bytes. Raises queue.Empty on
+        timeout and BufferClosed once closed and drained.
+        """
+        if not self.full.acquire(timeout=timeout):   # wait for filled slot
+            raise queue.Empty
+        buf = self.shm.buf
+        with self.get_lock:
+            put_count, get_count, closed = HEADER.unpack_from(buf, 0)
+            if closed and put_count == get_count:
+                self.full.release()   # pass the wake-up on to the next consumer
+                raise BufferClosed
+            offset = HEADER.size + (get_count % self.slots) * self.stride
+            (size,) = LENGTH.unpack_from(buf, offset)
+            data = bytes(buf[offset + LENGTH.size:offset + LENGTH.size + size])
+            COUNT.pack_into(buf, COUNT.size, get_count + 1)
+        self.empty.release()   # increase empty slots
+        return data
+
+    def close(self):
+        """Stops producers and lets consumers finish once the buffer drains."""
+        # Holding put_lock means no put is half done, so once the flag is
+        # set the put counter is final and consumers can trust it.
+        with self.put_lock:
+            COUNT.pack_into(self.shm.buf, 2 * COUNT.size, 1)
+        self.full.release()
+        self.empty.release()
+
+    def __iter__(self):
+        """Yields items until the buffer is closed and drained."""
+        while True:
+            try:
+                yield self.get()
+            except BufferClosed:
+                return
+
+    def detach(self):
+        """Unmaps the shared memory in this process."""
+        self.shm.close()
+
+    def unlink(self):
+        """Detaches and destroys the shared memory; call once, from the creator."""
+        self.shm.close()
+        self.shm.unlink()
+
+
+def producer(ring, start, count):
+    for item in range(start, start + count):
+        ring.put(COUNT.pack(item))
+
+
+def consumer(ring, results):
+    # CPU-bound work per item, running in its own process
+    total = 0
+    for data in ring:
+        (item,) = COUNT.unpack(data)
+        total += sum(i * i for i in range(item % 1000))
+    results.put(total)
+    ring.detach()
+
+
+# -------- MAIN --------
+if __name__ == "__main__":
+    ring = SharedRingBuffer(slots=64, slot_size=COUNT.size)
+    results = mp.Queue()
+
+    producers = [mp.Process(target=producer, args=(ring, n * 10000, 10000)) for n in range(2)]
+    consumers = [mp.Process(target=consumer, args=(ring, results))
+                 for _ in range(mp.cpu_count())]
+
+    for p in producers + consumers:
+        p.start()
+    for p in producers:
+        p.join()
+    ring.close()   # consumers drain the rest, then stop
+    totals = [results.get() for _ in consumers]
+    for p in consumers:
+        p.join()
+    ring.unlink()
+
+    print(f"{len(consumers)} consumers processed 20000 items, checksum {sum(totals)}")
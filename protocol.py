@@ -0,0 +1,91 @@
+import struct
+import sys
+from array import array
+
+# --- Wire Protocol shared by RPCS.py and RPCC.py ---
+#
+# Line mode (default): "choice a b\n" -> "result\n". Handy for debugging
+# with netcat.
+#
+# Binary mode: the client opens with HELLO_BINARY, the server answers
+# HELLO_OK, and from then on requests are fixed-size CALL records and
+# replies fixed-size RESULT records, see below.
+#
+# Framed mode: the client opens with HELLO_FRAMED, the server answers
+# HELLO_OK, and from then on every message in either direction is a
+# FRAME header followed by `length` bytes of body. The request id is
+# chosen by the client and echoed in the reply, so requests can be
+# pipelined and replies matched up in any order.
+
+HELLO_FRAMED = b"FRAMED\n"
+HELLO_BINARY = b"BINARY\n"
+HELLO_OK = b"OK\n"
+
+# Format: (request id, body length, body kind)
+FRAME = struct.Struct("!IIB")
+KIND_TEXT = 0     # body is a line-mode request/reply without the newline
+KIND_BATCH = 1    # body is a packed batch request/reply, see below
+
+MAX_BODY = 16 << 20  # refuse frames larger than this
+
+# --- Batch Bodies ---
+# Request: BATCH header (op, count), then for op == OP_MIXED one op byte
+# per element, then `count` big-endian int64 `a` values and `count` `b`
+# values. Reply: `count` big-endian int64 results. Arithmetic wraps at
+# 64 bits.
+BATCH = struct.Struct("!BI")
+OP_MIXED = 0
+OP_ADD = 1
+OP_SUB = 2
+
+
+def pack_int64(values):
+    """Packs a sequence of ints as big-endian int64."""
+    packed = array("q", values)
+    if sys.byteorder == "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack_int64(data):
+    """Unpacks big-endian int64 bytes into an array('q')."""
+    values = array("q")
+    values.frombytes(data)
+    if sys.byteorder == "little":
+        values.byteswap()
+    return values
+
+
+def pack_batch(op, a, b):
+    """Body for one op applied element-wise to equal-length a and b."""
+    if len(a) != len(b):
+        raise ValueError("Batch operands differ in length")
+    return BATCH.pack(op, len(a)) + pack_int64(a) + pack_int64(b)
+
+
+def pack_batch_mixed(triples):
+    """Body for a list of (op, a, b) triples."""
+    ops, a, b = zip(*triples) if triples else ((), (), ())
+    return BATCH.pack(OP_MIXED, len(ops)) + bytes(ops) + pack_int64(a) + pack_int64(b)
+
+
+# --- Binary Mode Records ---
+# Request: (request id, opcode, a, b). For OP_BATCH, `a` is the length
+# of a batch body that follows the record and `b` is unused.
+# Reply: (request id, status, value). For STATUS_BATCH, `value` is the
+# length of the packed results that follow the record. Operands and
+# results are int64 and arithmetic wraps, as in batches.
+CALL = struct.Struct("!IBqq")
+RESULT = struct.Struct("!IBq")
+OP_BATCH = 0x80
+
+STATUS_OK = 0
+STATUS_BATCH = 1
+STATUS_BAD_OP = 2
+STATUS_BAD_REQUEST = 3
+
+# Reply text for the error statuses, as line mode would have sent it
+STATUS_TEXT = {
+    STATUS_BAD_OP: "Invalid Operation",
+    STATUS_BAD_REQUEST: "Invalid Request",
+}
@@ -0,0 +1,88 @@
+import random
+
+# --- Random Source Programs for Equivalence Tests ---
+
+IS_OPS = ("ADD", "SUB", "MULT", "MOVER", "MOVEM", "COMP", "DIV")
+REGISTERS = ("AREG", "BREG", "CREG", "DREG")
+CONDITIONS = ("LT", "LE", "EQ", "GT", "GE", "ANY")
+
+
+def ass_program(seed, n=300):
+    """
+    A random ass.py program as [label, opcode, op1, op2] lines: forward
+    and backward references, literals, LTORG, DS, DC, EQU and lines with
+    only a label. A label may be used without being defined, but none is
+    defined twice.
+    """
+    rng = random.Random(seed)
+    labels = [f"L{i}" for i in range(40)]
+    defined = set()
+    lines = [["", "START", str(rng.randint(0, 500)), ""]]
+    for i in range(n):
+        label = ""
+        if rng.random() < 0.15:
+            candidate = rng.choice(labels)
+            if candidate not in defined:
+                label = candidate
+                defined.add(candidate)
+        r = rng.random()
+        if r < 0.55:
+            k = rng.random()
+            if k < 0.35:
+                operand = f"='{rng.randint(0, 30)}'"
+            elif k < 0.8:
+                operand = rng.choice(labels)
+            else:
+                operand = str(rng.randint(0, 99))
+            lines.append([label, rng.choice(IS_OPS), rng.choice(REGISTERS), operand])
+        elif r < 0.62:
+            lines.append([label, "BC", rng.choice(CONDITIONS), rng.choice(labels)])
+        elif r < 0.70:
+            lines.append([label, rng.choice(("READ", "PRINT")), rng.choice(labels), ""])
+        elif r < 0.76 and not label:
+            lines.append(["", "LTORG", "", ""])
+        elif r < 0.84:
+            lines.append([label, "DS", str(rng.randint(1, 5)), ""])
+        elif r < 0.90:
+            lines.append([label, "DC", f"'{rng.randint(0, 999)}'", ""])
+        elif r < 0.93 and defined and not label:
+            lines.append([f"E{i}", "EQU", rng.choice(sorted(defined)), ""])
+        elif r < 0.96 and label:
+            lines.append([label, "", "", ""])
+        else:
+            lines.append([label, "STOP", "", ""])
+    lines.append(["", "END", "", ""])
+    return lines
+
+
+def ass_text(lines):
+    """Formats [label, opcode, op1, op2] lines as ass.py source text."""
+    out = []
+    for label, opcode, op1, op2 in lines:
+        operands = ", ".join(op for op in (op1, op2) if op)
+        out.append(f"{label:8}{opcode} {operands}".rstrip())
+    return "\n".join(out) + "\n"
+
+
+def assembler1_program(seed, n=300):
+    """A random Assembler1.py program as source text, every symbol defined."""
+    rng = random.Random(seed)
+    labelled = sorted(rng.sample(range(n), n // 5))
+    is_label = set(labelled)
+    out = ["START 100"]
+    for i in range(n):
+        label = f"L{i}: " if i in is_label else ""
+        r = rng.random()
+        if label and r < 0.2:
+            out.append(f"{label}DS {rng.randint(1, 5)}")
+        elif label and r < 0.4:
+            out.append(f"{label}DC {rng.randint(0, 999)}")
+        else:
+            symbol = f"L{rng.choice(labelled)}"
+            op = rng.choice(("MOVER", "ADD", "STORE", "SUB", "JMP"))
+            if op == "JMP":
+                out.append(f"{label}JMP {symbol}")
+            else:
+                out.append(f"{label}{op} {rng.choice('ABCD')}, {symbol}")
+    out.append("END")
+    return "\n".join(out) + "\n"
@@ -0,0 +1,104 @@
+import pytest
+
+import ass
+from programs import ass_program, ass_text
+
+
+def same_pass1(a, b):
+    return a[:3] == b[:3] and list(a[3]) == list(b[3])
+
+
+# --- Pass 1 ---
+
+def test_tokenize_round_trips_generated_lines():
+    for seed in range(50):
+        program = ass_program(seed)
+        assert [list(line) for line in ass.tokenize(ass_text(program))] == program
+
+
+def test_pass1_accepts_text_or_lines():
+    for seed in range(50):
+        program = ass_program(seed)
+        assert same_pass1(ass.pass1(program), ass.pass1(ass_text(program)))
+
+
+def test_operand_int_rejects_is_a_symbol():
+    # '²' passes str.isdigit() but not int(); it must stay a symbol
+    source = """
+        START 100
+        MOVER AREG, X²
+        ADD AREG, 5
+X²      DC '3'
+        END
+"""
+    symtab, littab, pooltab, ic = ass.pass1(source)
+    assert symtab == [["X²", 102]]
+    assert ass.pass2(ic, symtab, littab, pooltab) == [
+        ["100", "04", "1", "102"], ["101", "01", "1", "5"], ["102", "00", "0", "003"]]
+    assert ass.assemble_one_pass(source)[3] == ass.pass2(ic, symtab, littab, pooltab)
+
+
+def test_literal_pool_places_each_literal_once_per_pool():
+    source = """
+        START 100
+        ADD AREG, ='5'
+        ADD AREG, ='5'
+        ADD AREG, ='05'
+        LTORG
+        ADD AREG, ='5'
+        ADD AREG, ='7'
+        END
+"""
+    symtab, littab, pooltab, ic = ass.pass1(source)
+    assert littab == [["='5'", 103], ["='05'", 104], ["='7'", 107]]
+    assert pooltab == [0, 2, 3]
+
+    symtab, littab, pooltab, ic = ass.pass1(source, dedup_literals=True)
+    assert littab == [["='5'", 103], ["='05'", 103], ["='7'", 106]]
+
+
+# --- Pass 2 ---
+
+def as_ints(machine_code):
+    return [[int(x) for x in row] for row in machine_code]
+
+
+def test_pass2_array_matches_pass2():
+    if ass.np is None:
+        pytest.skip("pass2_array() needs numpy")
+    for seed in range(100):
+        symtab, littab, pooltab, ic = ass.pass1(ass_program(seed))
+        mc = ass.pass2(ic, symtab, littab, pooltab)
+        assert ass.pass2_array(ic, symtab, littab).tolist() == as_ints(mc)
+
+
+def test_one_pass_matches_pass1_and_pass2():
+    for seed in range(100):
+        program = ass_program(seed)
+        for dedup in (False, True):
+            symtab, littab, pooltab, ic = ass.pass1(program, dedup_literals=dedup)
+            mc = ass.pass2(ic, symtab, littab, pooltab)
+            assert ass.assemble_one_pass(program, dedup_literals=dedup) == (symtab, littab, pooltab, mc)
+
+            rows = []
+            tables = ass.assemble_one_pass(program, rows.append, dedup)
+            assert tables == (symtab, littab, pooltab, None)
+            assert rows == mc
+
+
+def test_constants_are_decimal_integers(capsys):
+    source = """
+        START 100
+        ADD AREG, ='+5'
+        ADD AREG, ='A'
+X       DC 'A'
+Y       DC '+5'
+Z       DC '0007'
+        END
+"""
+    symtab, littab, pooltab, ic = ass.pass1(source)
+    assert capsys.readouterr().out == "Error: Invalid constant 'A'\nError: Invalid constant ='A'\n"
+    mc = ass.pass2(ic, symtab, littab, pooltab)
+    assert [row[3] for row in mc] == ["105", "106", "000", "005", "007", "005", "000"]
+    assert ass.assemble_one_pass(source)[3] == mc
+    assert capsys.readouterr().out == "Error: Invalid constant 'A'\nError: Invalid constant ='A'\n"
@@ -0,0 +1,45 @@
+import io
+
+from Assembler1 import Assembler, read_spool
+from programs import assembler1_program
+
+
+def assemble_streaming(assembler, text):
+    spool = io.BytesIO()
+    assembler.pass1_streaming(io.StringIO(text), spool)
+    spool.seek(0)
+    output = io.StringIO()
+    assembler.pass2_streaming(spool, output)
+    return spool, output.getvalue()
+
+
+def test_streaming_matches_default():
+    for seed in range(50):
+        text = assembler1_program(seed)
+        default = Assembler()
+        streamed = Assembler()
+        expected = default.assemble(text)
+        spool, actual = assemble_streaming(streamed, text)
+        assert actual == expected
+        assert streamed.symtab == default.symtab
+        assert streamed.errors == default.errors == []
+
+        # Object files too, from the spool and from the intermediate code
+        expected_obj = io.BytesIO()
+        default.write_object(expected_obj)
+        spool.seek(0)
+        actual_obj = io.BytesIO()
+        streamed.write_object(actual_obj, read_spool(spool))
+        assert actual_obj.getvalue() == expected_obj.getvalue()
+
+
+def test_undefined_symbol_reported_once():
+    text = "START 100\nADD A, NOPE\nJMP NOPE\nEND\n"
+    assembler = Assembler()
+    first = assembler.assemble(text)
+    assert assembler.pass2() == first
+    assert assembler.errors == ["Error: Symbol 'NOPE' was used but not defined."]
+
+    # A new pass 1 starts over
+    assembler.assemble(text)
+    assert len(assembler.errors) == 1
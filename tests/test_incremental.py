@@ -0,0 +1,157 @@
+import os
+import random
+
+import pytest
+
+import ass
+from incremental import Block, BlockCache, IncrementalAssembler, parse_block
+from programs import ass_program
+
+
+def assert_same_pass1(expected, actual):
+    symtab, littab, pooltab, ic = expected
+    assert actual[:3] == (symtab, littab, pooltab)
+    assert list(actual[3]) == list(ic)
+
+
+@pytest.mark.parametrize("block_lines", [3, 256])
+def test_matches_pass1(block_lines, capsys):
+    assembler = IncrementalAssembler(block_lines=block_lines)
+    for seed in range(100):
+        program = ass_program(seed)
+        expected = ass.pass1(program)
+        expected_out = capsys.readouterr().out
+        assert_same_pass1(expected, assembler.pass1(program))
+        assert capsys.readouterr().out == expected_out
+
+
+def test_matches_pass1_after_an_edit():
+    assembler = IncrementalAssembler(block_lines=8)
+    for seed in range(50):
+        program = ass_program(seed)
+        assembler.pass1(program)
+        # Change one unlabelled instruction in the second half
+        i = next(i for i in range(len(program) // 2, len(program))
+                 if not program[i][0] and program[i][1] in ("ADD", "SUB", "STOP"))
+        program[i] = ["", "ADD", "AREG", "='99'"]
+        assert_same_pass1(ass.pass1(program), assembler.pass1(program))
+        assert assembler.stats["parsed"] <= 1
+        assert assembler.stats["memory"] == assembler.stats["blocks"] - assembler.stats["parsed"]
+
+
+def test_matches_pass1_through_a_series_of_edits(capsys):
+    # Edits anywhere, insertions (some defining a label twice), deletions,
+    # growth and truncation, toggling dedup_literals, all on one assembler
+    assembler = IncrementalAssembler(block_lines=4)
+    for seed in range(10):
+        rng = random.Random(seed)
+        program = ass_program(seed)
+        for step in range(30):
+            i = rng.randrange(1, len(program))
+            r = rng.random()
+            if r < 0.3:
+                program[i] = ["", "SUB", "BREG", f"='{step}'"]
+            elif r < 0.5:
+                program.insert(i, [f"L{rng.randrange(40)}", "ADD", "AREG", "L1"])
+            elif r < 0.7:
+                del program[i]
+            elif r < 0.8:
+                program[-1:-1] = [["", "MULT", "CREG", f"L{step}"], ["", "LTORG", "", ""]]
+            elif r < 0.9:
+                program[i:-1] = []
+            dedup = step % 10 == 9
+            try:
+                expected = ass.pass1(program, dedup_literals=dedup)
+            except KeyError:   # an EQU or ORIGIN naming no symbol
+                with pytest.raises(KeyError):
+                    assembler.pass1(program, dedup_literals=dedup)
+                capsys.readouterr()
+                continue
+            expected_out = capsys.readouterr().out
+            assert_same_pass1(expected, assembler.pass1(program, dedup_literals=dedup))
+            assert capsys.readouterr().out == expected_out
+
+
+def test_layout_is_reused_before_the_first_edit():
+    assembler = IncrementalAssembler(block_lines=8)
+    program = ass_program(3, 2000)
+    assembler.pass1(program)
+    assembler.pass1(program)
+    assert assembler.stats["reused"] == assembler.stats["blocks"]
+
+    i = next(i for i in range(len(program) - 50, len(program))
+             if not program[i][0] and program[i][1] in ("ADD", "SUB", "STOP"))
+    program[i] = ["", "ADD", "AREG", "='99'"]
+    assert_same_pass1(ass.pass1(program), assembler.pass1(program))
+    assert assembler.stats["reused"] >= assembler.stats["blocks"] - 8
+
+
+def test_results_are_the_callers_to_change():
+    assembler = IncrementalAssembler(block_lines=8)
+    program = ass_program(5)
+    expected = ass.pass1(program)
+    symtab, littab, pooltab, ic = assembler.pass1(program)
+    symtab[0][1] = littab[0][1] = -7
+    pooltab.append(99)
+    ic.val1[0] = -7
+    assert_same_pass1(expected, assembler.pass1(program))
+
+
+def test_matches_pass1_with_deduplicated_literals():
+    assembler = IncrementalAssembler(block_lines=8)
+    for seed in range(50):
+        program = ass_program(seed)
+        assert_same_pass1(ass.pass1(program, dedup_literals=True),
+                          assembler.pass1(program, dedup_literals=True))
+
+
+def test_disk_cache_serves_a_new_assembler(tmp_path):
+    program = ass_program(7, 2000)
+    first = IncrementalAssembler(tmp_path, block_lines=16)
+    first.pass1(program)
+    assert first.stats["parsed"] == first.stats["blocks"]
+
+    second = IncrementalAssembler(tmp_path, block_lines=16)
+    assert_same_pass1(ass.pass1(program), second.pass1(program))
+    assert second.stats["disk"] == second.stats["blocks"]
+    assert second.stats["parsed"] == 0
+    # Entries name no class of incremental.py, which may have run as __main__
+    for entry in os.scandir(tmp_path):
+        with open(entry.path, "rb") as f:
+            assert b"Block" not in f.read()
+
+
+def test_block_state_round_trip():
+    block = parse_block([("X", "ADD", "AREG", "='5'"), ("", "DS", "3", ""), ("", "BC", "ANY", "X")])
+    copy = Block.from_state(block.state())
+    assert (copy.size, copy.names, copy.literals, copy.labels) == \
+           (block.size, block.names, block.literals, block.labels)
+    assert list(copy.rows) == list(block.rows)
+
+
+def test_cache_size_tracks_rewrites_and_eviction(tmp_path):
+    cache = BlockCache(tmp_path, max_bytes=4096)
+    block = parse_block([("", "ADD", "AREG", f"S{i}") for i in range(20)])
+    for _ in range(5):
+        cache.put("same", block)
+    assert cache.size == os.path.getsize(tmp_path / "same.blk")
+
+    for i in range(40):
+        cache.put(f"key{i}", block)
+    on_disk = sum(entry.stat().st_size for entry in os.scandir(tmp_path))
+    assert cache.size == on_disk <= 4096
+    assert cache.get("key39") is not None
+
+
+def test_block_errors_are_printed_on_every_run(tmp_path, capsys):
+    source = list(ass.tokenize("        START 100\nX       DC 'A'\n        END\n"))
+    assembler = IncrementalAssembler(tmp_path)
+    for _ in range(2):
+        assembler.pass1(source)
+        assert capsys.readouterr().out == "Error: Invalid constant 'A'\n"
+    assert assembler.stats["memory"] == 1
+
+    fresh = IncrementalAssembler(tmp_path)
+    assert fresh.pass1(source)[0] == [["X", 100]]
+    assert capsys.readouterr().out == "Error: Invalid constant 'A'\n"
+    assert fresh.stats["disk"] == 1
@@ -0,0 +1,97 @@
+from linker import assemble_modules, link
+from objfile import ObjectFile
+
+MAIN = """
+        START 100
+        ENTRY MAIN
+        EXTRN SUM
+MAIN    MOVER AREG, ='5'
+        ADD AREG, SUM
+        BC ANY, LOOP
+LOOP    MOVEM AREG, X
+X       DS 2
+        END
+"""
+
+SUM = """
+        START 0
+        ENTRY SUM
+        EXTRN MAIN
+SUM     DC '7'
+        BC ANY, MAIN
+        END
+"""
+
+
+def write_modules(tmp_path, *sources):
+    paths = []
+    for i, source in enumerate(sources):
+        path = tmp_path / f"m{i}.asm"
+        path.write_text(source)
+        paths.append(str(path))
+    return paths
+
+
+def test_relocates_and_patches_externals(tmp_path, capsys):
+    modules = assemble_modules(write_modules(tmp_path, MAIN, SUM), workers=1)
+    assert [(module.origin, module.size) for module in modules] == [(100, 7), (0, 2)]
+
+    # MAIN moves from 100 to 1000 and SUM from 0 to 1007
+    path = tmp_path / "a.obj"
+    assert link(modules, path, base=1000) == {"MAIN": 1000, "SUM": 1007}
+    assert capsys.readouterr().out == ""
+    with ObjectFile(path) as obj:
+        assert obj.start == 1000
+        assert obj.symbols == {"MAIN": 1000, "SUM": 1007}
+        assert list(obj.words()) == [
+            (1000, 4, 1, 1006),   # the literal, relocated
+            (1001, 1, 1, 1007),   # EXTRN SUM, patched
+            (1002, 7, 6, 1003),
+            (1003, 5, 1, 1004),
+            (1004, 0, 0, 0), (1005, 0, 0, 0),
+            (1006, 0, 0, 5),
+            (1007, 0, 0, 7),
+            (1008, 7, 6, 1000),   # EXTRN MAIN, patched
+        ]
+
+
+def test_layout_follows_module_order(tmp_path):
+    modules = assemble_modules(write_modules(tmp_path, SUM, MAIN), workers=1)
+    path = tmp_path / "a.obj"
+    assert link(modules, path) == {"SUM": 0, "MAIN": 2}
+    with ObjectFile(path) as obj:
+        assert obj[1] == (7, 6, 2)
+        assert obj[3] == (1, 1, 0)
+
+
+def test_reports_unresolved_and_duplicate_symbols(tmp_path, capsys):
+    other = """
+        START 0
+        ENTRY SUM
+        ENTRY LOST
+        EXTRN NOPE
+SUM     ADD AREG, NOPE
+        END
+"""
+    paths = write_modules(tmp_path, MAIN, SUM, other)
+    modules = assemble_modules(paths, workers=1)
+    assert capsys.readouterr().out == f"Error: ENTRY symbol 'LOST' is not defined in '{paths[2]}'.\n"
+
+    path = tmp_path / "a.obj"
+    assert link(modules, path, base=1000) == {"MAIN": 1000, "SUM": 1007}
+    assert capsys.readouterr().out == (
+        f"Error: Duplicate ENTRY symbol 'SUM' in '{paths[2]}'\n"
+        f"Error: Unresolved external 'NOPE' in '{paths[2]}'\n")
+    with ObjectFile(path) as obj:
+        assert obj[1009] == (1, 1, -1)
+
+
+def test_pool_matches_one_worker(tmp_path):
+    sources = [MAIN, SUM] + [SUM.replace("SUM", f"S{i}").replace("MAIN", "SUM") for i in range(6)]
+    paths = write_modules(tmp_path, *sources)
+    outputs = []
+    for workers in (1, 3):
+        path = tmp_path / f"a{workers}.obj"
+        link(assemble_modules(paths, workers), path, base=500)
+        outputs.append(path.read_bytes())
+    assert outputs[0] == outputs[1]
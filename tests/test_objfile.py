@@ -0,0 +1,82 @@
+import pytest
+
+import ass
+from objfile import DATA_CHUNK, ObjectFile, ObjectWriter
+from programs import ass_program
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "test.obj"
+    with open(path, "wb") as f:
+        out = ObjectWriter(f)
+        out.word(100, 4, 1, 105)
+        out.word(101, 1, 2, 7)
+        out.reserve(102, 3)
+        out.reserve(105, 0)
+        out.word(105, 0, 0, 42)
+        out.reserve(200, 2)       # a gap from 106 to 199
+        out.finish([("X", 105), ("Y", 200)], start=100)
+    assert out.block_count == 4
+
+    with ObjectFile(path) as obj:
+        assert obj.start == 100
+        assert obj.symbols == {"X": 105, "Y": 200}
+        assert len(obj) == 8
+        assert list(obj.words()) == [
+            (100, 4, 1, 105), (101, 1, 2, 7), (102, 0, 0, 0), (103, 0, 0, 0),
+            (104, 0, 0, 0), (105, 0, 0, 42), (200, 0, 0, 0), (201, 0, 0, 0)]
+        assert obj[101] == (1, 2, 7)
+        assert obj[103] == (0, 0, 0)
+        assert obj[201] == (0, 0, 0)
+        for address in (99, 106, 199, 202):
+            with pytest.raises(KeyError):
+                obj[address]
+
+
+def test_large_data_block_is_split(tmp_path):
+    path = tmp_path / "large.obj"
+    n = DATA_CHUNK + 10
+    with open(path, "wb") as f:
+        out = ObjectWriter(f)
+        for i in range(n):
+            out.word(i, 1, 0, i)
+        out.finish([])
+    assert out.block_count == 2
+
+    with ObjectFile(path) as obj:
+        assert len(obj) == n
+        assert obj[n - 1] == (1, 0, n - 1)
+        assert list(obj.words()) == [(i, 1, 0, i) for i in range(n)]
+
+
+def test_not_an_object_file(tmp_path):
+    path = tmp_path / "text.obj"
+    path.write_bytes(b"not an object file at all")
+    with pytest.raises(ValueError):
+        ObjectFile(path)
+
+
+def test_pass2_object_matches_pass2(tmp_path):
+    path = tmp_path / "output.obj"
+    for seed in range(50):
+        symtab, littab, pooltab, ic = ass.pass1(ass_program(seed))
+        mc = ass.pass2(ic, symtab, littab, pooltab)
+        ass.pass2_object(ic, symtab, littab, path)
+        with ObjectFile(path) as obj:
+            assert obj.start == ic.val1[0]
+            assert obj.symbols == dict(symtab)
+            words = [[str(lc), f"{op:02d}", str(f1), str(f2)] for lc, op, f1, f2 in obj.words()]
+            assert words == [line[:3] + [str(int(line[3]))] for line in mc]
+            for line in mc:
+                assert obj[int(line[0])] == tuple(int(x) for x in line[1:])
+
+
+def test_64_bit_constants(tmp_path):
+    path = tmp_path / "big.obj"
+    source = "        START 100\nX       DC '5000000000'\nY       DC '-5000000000'\n        END\n"
+    symtab, littab, pooltab, ic = ass.pass1(source)
+    assert ass.pass2(ic, symtab, littab, pooltab) == [
+        ["100", "00", "0", "5000000000"], ["101", "00", "0", "-5000000000"]]
+    ass.pass2_object(ic, symtab, littab, path)
+    with ObjectFile(path) as obj:
+        assert list(obj.words()) == [(100, 0, 0, 5000000000), (101, 0, 0, -5000000000)]
@@ -0,0 +1,193 @@
+import asyncio
+import socket
+import struct
+import threading
+import time
+
+import pytest
+
+import RPCS
+from protocol import (CALL, FRAME, HELLO_BINARY, HELLO_FRAMED, HELLO_OK,
+                      KIND_BATCH, KIND_TEXT, MAX_BODY, OP_ADD, OP_BATCH,
+                      OP_SUB, RESULT, STATUS_BAD_OP, STATUS_BAD_REQUEST,
+                      STATUS_BATCH, STATUS_OK, pack_batch, pack_int64,
+                      unpack_int64)
+from RPCC import RPCClient, recv_exact
+
+
+@pytest.fixture
+def server():
+    """Runs serve() on an event loop of its own; yields its (host, port)."""
+    loop = asyncio.new_event_loop()
+    stop = asyncio.Event()
+    started = threading.Event()
+    addresses = []
+
+    def ready(bound):
+        addresses.extend(bound)
+        started.set()
+
+    thread = threading.Thread(target=loop.run_until_complete, daemon=True,
+                              args=(RPCS.serve("127.0.0.1", 0, stop=stop, ready=ready),))
+    thread.start()
+    assert started.wait(5)
+    yield addresses[0][:2]
+    loop.call_soon_threadsafe(stop.set)
+    thread.join(10)
+    loop.close()
+
+
+def connect(address, hello):
+    sock = socket.create_connection(address, 5)
+    sock.sendall(hello)
+    assert recv_exact(sock, len(HELLO_OK)) == HELLO_OK
+    return sock
+
+
+def send_in_pieces(sock, data, size):
+    """Sends `data` `size` bytes at a time, so the server sees split reads."""
+    for i in range(0, len(data), size):
+        sock.sendall(data[i:i + size])
+        time.sleep(0.001)
+
+
+def is_closed(sock):
+    try:
+        return sock.recv(1) == b""
+    except ConnectionResetError:
+        return True
+
+
+# --- Client Round Trips ---
+
+def test_framed_client(server):
+    with RPCClient(*server) as client:
+        assert client.call("1", 2, 3) == "5"
+        assert client.call("sub", 2, 3) == "-1"
+        assert client.call("9", 2, 3) == "Invalid Operation"
+        assert client.call("1", "x", 3) == "Invalid Request"
+        assert client.call_many([("1", i, i) for i in range(100)]) == [str(2 * i) for i in range(100)]
+        assert list(client.add_many([1, 2], [10, 20])) == [11, 22]
+        assert list(client.batch_mixed([(OP_ADD, 5, 1), (OP_SUB, 5, 1)])) == [6, 4]
+        with pytest.raises(ValueError, match="Invalid Operation"):
+            client.batch(7, [1], [1])
+        assert client.stats()["calls"]["add"] >= 101
+
+
+def test_binary_client(server):
+    with RPCClient(*server, binary=True) as client:
+        assert client.call(1, 2, 3) == 5
+        assert client.add((1 << 63) - 1, 1) == -(1 << 63)   # wraps at 64 bits
+        assert client.call(9, 2, 3) == "Invalid Operation"
+        assert client.call(3, 0, RPCS.PRIMES_LIMIT + 1) == "Invalid Request"
+        futures = [client.submit(2, i, 1) for i in range(1000)]
+        assert [future.result(5) for future in futures] == list(range(-1, 999))
+
+
+def test_large_batches_arrive_in_pieces(server):
+    # Far larger than one 64 KiB read, in both directions
+    a = list(range(100_000))
+    b = [3] * len(a)
+    for binary in (False, True):
+        with RPCClient(*server, binary=binary) as client:
+            assert list(client.add_many(a, b, timeout=10)) == [x + 3 for x in a]
+            assert client.add(1, 1) == 2
+
+
+def test_out_of_range_argument_leaves_no_pending_future(server):
+    with RPCClient(*server, binary=True) as client:
+        with pytest.raises(struct.error):
+            client.submit(1, 1 << 63, 0)
+        assert client._pending == {}
+        assert client.add(1, 2) == 3
+
+
+# --- Raw Streams ---
+
+def test_binary_records_split_across_reads(server):
+    sock = connect(server, HELLO_BINARY)
+    body = pack_batch(OP_SUB, [10, 20], [1, 2])
+    requests = (CALL.pack(1, 1, 40, 2) + CALL.pack(2, 99, 0, 0)
+                + CALL.pack(3, OP_BATCH, len(body), 0) + body
+                + CALL.pack(4, 2, 1, 2))
+    send_in_pieces(sock, requests, 5)
+
+    replies = recv_exact(sock, 3 * RESULT.size + 16 + RESULT.size)
+    assert RESULT.unpack_from(replies, 0) == (1, STATUS_OK, 42)
+    assert RESULT.unpack_from(replies, RESULT.size) == (2, STATUS_BAD_OP, 0)
+    assert RESULT.unpack_from(replies, 2 * RESULT.size) == (3, STATUS_BATCH, 16)
+    start = 3 * RESULT.size
+    assert list(unpack_int64(replies[start:start + 16])) == [9, 18]
+    assert RESULT.unpack_from(replies, start + 16) == (4, STATUS_OK, -1)
+    sock.close()
+
+
+def test_binary_bad_batch_status(server):
+    sock = connect(server, HELLO_BINARY)
+    body = pack_batch(OP_ADD, [1], [2])[:-1]   # a byte short of its count
+    sock.sendall(CALL.pack(5, OP_BATCH, len(body), 0) + body)
+    assert RESULT.unpack(recv_exact(sock, RESULT.size)) == (5, STATUS_BAD_REQUEST, 0)
+    sock.close()
+
+
+def test_framed_frames_split_across_reads(server):
+    sock = connect(server, HELLO_FRAMED)
+    text = b"1 40 2"
+    body = pack_batch(OP_ADD, [1, 2], [3, 4])
+    requests = (FRAME.pack(7, len(text), KIND_TEXT) + text
+                + FRAME.pack(8, len(body), KIND_BATCH) + body
+                + FRAME.pack(9, 1, 5) + b"x")
+    send_in_pieces(sock, requests, 3)
+
+    assert FRAME.unpack(recv_exact(sock, FRAME.size)) == (7, 2, KIND_TEXT)
+    assert recv_exact(sock, 2) == b"42"
+    assert FRAME.unpack(recv_exact(sock, FRAME.size)) == (8, 16, KIND_BATCH)
+    assert list(unpack_int64(recv_exact(sock, 16))) == [4, 6]
+    assert FRAME.unpack(recv_exact(sock, FRAME.size)) == (9, 15, KIND_TEXT)
+    assert recv_exact(sock, 15) == b"Invalid Request"
+    sock.close()
+
+
+def test_oversized_bodies_drop_the_connection(server):
+    sock = connect(server, HELLO_FRAMED)
+    sock.sendall(FRAME.pack(1, MAX_BODY + 1, KIND_BATCH))
+    assert is_closed(sock)
+    sock.close()
+
+    sock = connect(server, HELLO_BINARY)
+    sock.sendall(CALL.pack(1, OP_BATCH, MAX_BODY + 1, 0))
+    assert is_closed(sock)
+    sock.close()
+
+    # The server itself is still fine
+    with RPCClient(*server, binary=True) as client:
+        assert client.add(1, 2) == 3
+
+
+def test_client_reads_split_replies_and_drops_oversized_ones():
+    # A fake binary-mode server: one reply in pieces, then an oversized batch
+    listener = socket.create_server(("127.0.0.1", 0))
+    replies = (RESULT.pack(1, STATUS_OK, 7) + RESULT.pack(2, STATUS_BATCH, 16)
+               + pack_int64([5, 6]) + RESULT.pack(3, STATUS_BAD_REQUEST, 0))
+
+    def fake_server():
+        conn, _ = listener.accept()
+        with conn:
+            assert recv_exact(conn, len(HELLO_BINARY)) == HELLO_BINARY
+            conn.sendall(HELLO_OK)
+            recv_exact(conn, 4 * CALL.size)
+            send_in_pieces(conn, replies, 7)
+            conn.sendall(RESULT.pack(4, STATUS_BATCH, MAX_BODY + 1))
+            time.sleep(0.5)
+
+    thread = threading.Thread(target=fake_server, daemon=True)
+    thread.start()
+    with RPCClient(*listener.getsockname(), binary=True) as client:
+        futures = [client.submit(1, 0, 0) for _ in range(4)]
+        assert futures[0].result(5) == 7
+        assert list(futures[1].result(5)) == [5, 6]
+        assert futures[2].result(5) == "Invalid Request"
+        with pytest.raises(ConnectionError):
+            futures[3].result(5)
+    thread.join(5)
+    listener.close()
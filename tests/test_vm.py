@@ -0,0 +1,132 @@
+import pytest
+
+import ass
+from vm import SAMPLE, Machine, MachineError, rows_to_words
+
+
+def load(source, inputs=()):
+    symtab, littab, pooltab, ic = ass.pass1(source)
+    return Machine(rows_to_words(ass.pass2(ic, symtab, littab, pooltab)), inputs=inputs)
+
+
+def load_object(tmp_path, source, inputs=()):
+    path = tmp_path / "program.obj"
+    symtab, littab, pooltab, ic = ass.pass1(source)
+    ass.pass2_object(ic, symtab, littab, path)
+    return Machine.from_object(path, inputs)
+
+
+BRANCH = """
+        START 100
+        MOVER AREG, A
+        COMP AREG, B
+        BC {}, YES
+        PRINT NO
+        STOP
+YES     PRINT ONE
+        STOP
+A       DC '{}'
+B       DC '2'
+NO      DC '0'
+ONE     DC '1'
+        END
+"""
+
+TAKEN = {
+    "LT": lambda a, b: a < b, "LE": lambda a, b: a <= b, "EQ": lambda a, b: a == b,
+    "GT": lambda a, b: a > b, "GE": lambda a, b: a >= b, "ANY": lambda a, b: True,
+}
+
+
+@pytest.mark.parametrize("condition", TAKEN)
+def test_branch_conditions(condition):
+    for a in (1, 2, 3):
+        machine = load(BRANCH.format(condition, a))
+        assert machine.run() == 5
+        assert machine.halted
+        assert machine.output == [int(TAKEN[condition](a, 2))]
+
+
+def test_arithmetic():
+    machine = load("""
+        START 100
+        MOVER AREG, A
+        ADD AREG, B
+        MULT AREG, B
+        SUB AREG, ='1'
+        DIV AREG, B
+        MOVEM AREG, R
+        PRINT R
+        STOP
+A       DC '7'
+B       DC '2'
+R       DS 1
+        END
+""")
+    machine.run()
+    assert machine.output == [8]   # ((7 + 2) * 2 - 1) // 2
+    assert machine.regs[1] == 8
+
+
+def test_division_by_zero():
+    machine = load("""
+        START 100
+        MOVER AREG, A
+        DIV AREG, Z
+        STOP
+A       DC '7'
+Z       DC '0'
+        END
+""")
+    with pytest.raises(MachineError, match="Division by zero at address 101"):
+        machine.run()
+
+
+def test_read_past_end_of_input():
+    machine = load("""
+        START 100
+        READ N
+        READ N
+        STOP
+N       DS 1
+        END
+""", inputs=["5"])
+    with pytest.raises(MachineError, match="READ past end of input at address 101"):
+        machine.run()
+    assert machine.memory[103] == 5
+
+
+def test_run_resumes_after_max_steps():
+    expected = load(SAMPLE, ["10"])
+    total = expected.run()
+
+    machine = load(SAMPLE, ["10"])
+    steps = 0
+    while not machine.halted:
+        steps += machine.run(7)
+    assert steps == machine.steps == total
+    assert machine.output == expected.output == [55]
+    assert machine.run() == 0
+
+
+@pytest.mark.parametrize("from_object", [False, True])
+def test_jump_into_origin_gap(tmp_path, from_object):
+    source = """
+        START 100
+        BC ANY, 150
+        ORIGIN 200
+        STOP
+        END
+"""
+    machine = load_object(tmp_path, source) if from_object else load(source)
+    with pytest.raises(MachineError, match="No code at address 150"):
+        machine.run()
+    assert machine.pc == 150
+    assert not machine.halted
+
+
+def test_sample(tmp_path):
+    machine = load_object(tmp_path, SAMPLE, ["1000"])
+    machine.run()
+    assert machine.halted
+    assert machine.output == [500500]
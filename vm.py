@@ -0,0 +1,247 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from ass import CONDTAB, OPTAB, pass1, pass2_object
+from objfile import ObjectFile
+
+# Opcodes, from ass.py's OPTAB
+STOP, ADD, SUB, MULT, MOVER, MOVEM, COMP, BC, DIV, READ, PRINT = (
+    int(OPTAB[name][1]) for name in
+    ('STOP', 'ADD', 'SUB', 'MULT', 'MOVER', 'MOVEM', 'COMP', 'BC', 'DIV', 'READ', 'PRINT'))
+
+# COMP leaves one of these flags; BC branches if its condition's mask has it
+FLAG_LT, FLAG_EQ, FLAG_GT = 1, 2, 4
+CONDITION_MASKS = {
+    CONDTAB['LT']: FLAG_LT, CONDTAB['LE']: FLAG_LT | FLAG_EQ,
+    CONDTAB['EQ']: FLAG_EQ, CONDTAB['GT']: FLAG_GT,
+    CONDTAB['GE']: FLAG_GT | FLAG_EQ, CONDTAB['ANY']: FLAG_LT | FLAG_EQ | FLAG_GT,
+}
+REGISTERS = range(1, 5)   # AREG..DREG
+
+
+class MachineError(Exception):
+    """Raised for a bad instruction, address or input while running."""
+
+
+class _NoCode(Exception):
+    """Raised at an address the program put no word at; run() reports it."""
+
+
+# -------- SIMULATOR --------
+class Machine:
+    """
+    Simulator for the machine code ass.py generates. `words` are
+    (address, opcode, field 1, field 2) tuples: ObjectFile.words(),
+    pass2_array(...).tolist(), or pass2() rows through rows_to_words().
+
+    Memory is a flat list of ints holding each word's value (field 2, which
+    is where a DC keeps its constant); instructions operate on it and on
+    the registers regs[1..4]. Every instruction is decoded once, at load
+    time, into a closure that executes it and returns the next address,
+    so running is a loop of one list index and one call per instruction.
+    Code is not re-decoded when MOVEM writes over it. Executing an address
+    the program has no word for (an ORIGIN gap, say) is an error, not a
+    halt.
+
+    READ takes values from `inputs`; PRINT appends to `output`.
+    """
+
+    def __init__(self, words, start=None, inputs=()):
+        words = list(words)
+        size = max((word[0] for word in words), default=-1) + 1
+        self.memory = [0] * size
+        self.regs = [0] * 5
+        self.flags = [FLAG_EQ]   # COMP result, in a list so the closures share it
+        self.inputs = iter(inputs)
+        self.output = []
+        self.steps = 0
+        self.halted = False
+        self.pc = min((word[0] for word in words), default=0) if start is None else start
+
+        for address, opcode, field1, field2 in words:
+            self.memory[address] = field2
+        # One extra slot past the end catches running off the end of memory
+        self.code = [self._no_code] * size + [self._decode(size, -1, 0, 0)]
+        for address, opcode, field1, field2 in words:
+            self.code[address] = self._decode(address, opcode, field1, field2)
+
+    @classmethod
+    def from_object(cls, path, inputs=()):
+        """Loads an objfile.py object file, starting at its START address."""
+        with ObjectFile(path) as obj:
+            return cls(obj.words(), obj.start, inputs)
+
+    @staticmethod
+    def _halt():
+        return None
+
+    @staticmethod
+    def _no_code():
+        raise _NoCode
+
+    def _decode(self, address, opcode, x, y):
+        """Returns the closure executing instruction (opcode, x, y) at `address`."""
+        memory = self.memory
+        regs = self.regs
+        flags = self.flags
+        nxt = address + 1
+        size = len(memory)
+
+        def fail(message):
+            def error():
+                raise MachineError(f"{message} at address {address}")
+            return error
+
+        if opcode == STOP:
+            return self._halt
+        if opcode == -1:
+            return fail("Ran off the end of memory")
+        if opcode in (READ, PRINT):
+            if not 0 <= x < size:
+                return fail(f"Address {x} out of range")
+            if opcode == READ:
+                inputs = self.inputs
+                def read():
+                    try:
+                        memory[x] = int(next(inputs))
+                    except StopIteration:
+                        raise MachineError(f"READ past end of input at address {address}")
+                    return nxt
+                return read
+            output = self.output
+            def print_():
+                output.append(memory[x])
+                return nxt
+            return print_
+        if opcode == BC:
+            if x not in CONDITION_MASKS:
+                return fail(f"Bad condition code {x}")
+            if not 0 <= y < size:
+                return fail(f"Branch target {y} out of range")
+            mask = CONDITION_MASKS[x]
+            if mask == FLAG_LT | FLAG_EQ | FLAG_GT:
+                return lambda: y
+            return lambda: y if flags[0] & mask else nxt
+
+        if x not in REGISTERS:
+            return fail(f"Bad register {x} for opcode {opcode:02d}")
+        if not 0 <= y < size:
+            return fail(f"Address {y} out of range")
+        if opcode == ADD:
+            def add():
+                regs[x] += memory[y]
+                return nxt
+            return add
+        if opcode == SUB:
+            def sub():
+                regs[x] -= memory[y]
+                return nxt
+            return sub
+        if opcode == MULT:
+            def mult():
+                regs[x] *= memory[y]
+                return nxt
+            return mult
+        if opcode == DIV:
+            def div():
+                if not memory[y]:
+                    raise MachineError(f"Division by zero at address {address}")
+                regs[x] //= memory[y]
+                return nxt
+            return div
+        if opcode == MOVER:
+            def mover():
+                regs[x] = memory[y]
+                return nxt
+            return mover
+        if opcode == MOVEM:
+            def movem():
+                memory[y] = regs[x]
+                return nxt
+            return movem
+        if opcode == COMP:
+            def comp():
+                a = regs[x]
+                b = memory[y]
+                flags[0] = FLAG_LT if a < b else FLAG_EQ if a == b else FLAG_GT
+                return nxt
+            return comp
+        return fail(f"Bad opcode {opcode:02d}")
+
+    def run(self, max_steps=None):
+        """
+        Runs until STOP or for at most max_steps instructions, and can be
+        called again to continue. Returns the number executed; `halted`
+        tells whether STOP was reached (pc is then None).
+        """
+        if self.halted:
+            return 0
+        code = self.code
+        pc = self.pc
+        steps = 0
+        try:
+            for steps in range(1, (sys.maxsize if max_steps is None else max_steps) + 1):
+                pc = code[pc]()
+                if pc is None:
+                    self.halted = True
+                    break
+        except _NoCode:
+            raise MachineError(f"No code at address {pc}") from None
+        finally:
+            self.steps += steps
+            self.pc = pc
+        return steps
+
+
+def rows_to_words(machine_code):
+    """Converts pass2() rows of strings to (address, opcode, field 1, field 2) ints."""
+    return [tuple(int(field) for field in row) for row in machine_code]
+
+
+# -------- MAIN --------
+# Sums 1..N read from input, then prints the total.
+SAMPLE = """
+        START 100
+        READ N
+        MOVER AREG, ='0'
+        MOVER BREG, ='1'
+LOOP    COMP BREG, N
+        BC GT, DONE
+        ADD AREG, I
+        MOVEM AREG, SUM
+        ADD BREG, ='1'
+        MOVEM BREG, I
+        BC ANY, LOOP
+DONE    PRINT SUM
+        STOP
+N       DS 1
+I       DC '1'
+SUM     DS 1
+        END
+"""
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run ass.py machine code")
+    parser.add_argument("object", nargs="?", help="object file to run (default: built-in sample)")
+    parser.add_argument("--input", action="append", default=[], help="value for READ (repeatable)")
+    parser.add_argument("--max-steps", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.object:
+        machine = Machine.from_object(args.object, args.input)
+    else:
+        symtab, littab, pooltab, ic = pass1(SAMPLE)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sample.obj")
+            pass2_object(ic, symtab, littab, path)
+            machine = Machine.from_object(path, args.input or ["100000"])
+
+    start = time.perf_counter()
+    steps = machine.run(args.max_steps)
+    elapsed = time.perf_counter() - start
+    print("Output:", machine.output)
+    print(f"{'Halted' if machine.halted else 'Stopped'} after {steps} instructions "
+          f"in {elapsed:.3f} s ({steps / elapsed / 1e6:.2f} M instructions/s)")